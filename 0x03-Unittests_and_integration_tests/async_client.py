@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""An asyncio github org client for querying many orgs at once
+"""
+import asyncio
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Tuple,
+)
+
+import aiohttp
+
+from client import GithubOrgClient
+
+
+class AsyncGithubOrgClient:
+    """An asyncio Github org client.
+    A single instance serves any number of orgs: every request shares one
+    pooled `aiohttp` session and a semaphore caps how many run at once.
+    Example
+    -------
+    >>> async with AsyncGithubOrgClient(max_concurrency=20) as client:
+    ...     async for org, repos in client.iter_public_repos(["google"]):
+    ...         print(org, len(repos))
+    """
+    ORG_URL = GithubOrgClient.ORG_URL
+
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        timeout: float = 30,
+        per_page: int = 100,
+    ) -> None:
+        """Init method of AsyncGithubOrgClient"""
+        self._max_concurrency = max_concurrency
+        self._timeout = timeout
+        self._per_page = per_page
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self) -> "AsyncGithubOrgClient":
+        """Open the pooled session"""
+        connector = aiohttp.TCPConnector(limit=self._max_concurrency)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self._timeout),
+        )
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Close the pooled session"""
+        await self._session.close()
+        self._session = None
+
+    async def _fetch(
+        self, url: str, params: Dict[str, Any] = None
+    ) -> Tuple[Any, str]:
+        """Get JSON and the URL of the next page, if any, from `url`,
+        with `params` added to its query string
+        """
+        async with self._semaphore:
+            async with self._session.get(url, params=params) as response:
+                response.raise_for_status()
+                payload = await response.json(content_type=None)
+                next_link = response.links.get("next")
+        return payload, str(next_link["url"]) if next_link else None
+
+    async def get_json(self, url: str) -> Any:
+        """Get JSON from remote URL"""
+        return (await self._fetch(url))[0]
+
+    async def org(self, org_name: str) -> Dict:
+        """Org payload of `org_name`"""
+        return await self.get_json(self.ORG_URL.format(org=org_name))
+
+    async def repos_payload(self, org_name: str) -> List[Dict]:
+        """Repos payload of `org_name`, following every page"""
+        org = await self.org(org_name)
+        # Next links carry per_page over to the following pages
+        page, url = await self._fetch(org["repos_url"],
+                                      {"per_page": self._per_page})
+        repos = list(page)
+        while url is not None:
+            page, url = await self._fetch(url)
+            repos.extend(page)
+        return repos
+
+    async def public_repos(
+        self, org_name: str, license: str = None
+    ) -> List[str]:
+        """Public repos of `org_name`"""
+        return [
+            repo["name"] for repo in await self.repos_payload(org_name)
+            if license is None or GithubOrgClient.has_license(repo, license)
+        ]
+
+    async def iter_public_repos(
+        self, org_names: Iterable[str], license: str = None
+    ) -> AsyncIterator[Tuple[str, List[str]]]:
+        """Yield `(org_name, public_repos)` pairs as each org completes"""
+        async def named(org_name: str) -> Tuple[str, List[str]]:
+            """Public repos of `org_name`, tagged with the org name"""
+            return org_name, await self.public_repos(org_name, license)
+
+        tasks = [asyncio.ensure_future(named(name)) for name in org_names]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def public_repos_by_org(
+        self, org_names: Iterable[str], license: str = None
+    ) -> Dict[str, List[str]]:
+        """Public repos of every org in `org_names`, keyed by org name"""
+        return {
+            org_name: repos async for org_name, repos
+            in self.iter_public_repos(org_names, license)
+        }
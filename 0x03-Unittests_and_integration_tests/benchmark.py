@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the github org client.
+Usage: ./benchmark.py [name ...]  (runs every benchmark by default)
+"""
+import asyncio
+import copy
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Tuple,
+)
+
+from async_client import AsyncGithubOrgClient
+from client import GithubOrgClient, Repo
+from fake_github import FakeGithubServer, synthetic_repos
+from fixtures import TEST_PAYLOAD
+from utils import (
+    JsonSession,
+    access_nested_map,
+    compile_path,
+    extract_path,
+    get_json,
+)
+
+
+def timed(fn: Callable) -> float:
+    """Seconds taken by one call of `fn`"""
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench_async_client() -> None:
+    """Sync client org by org vs the async client for 50 orgs"""
+    orgs = {
+        "org{}".format(i): synthetic_repos("org{}".format(i), 150)
+        for i in range(50)
+    }
+    with FakeGithubServer(orgs, latency=0.02) as fake:
+        def sync_scan() -> None:
+            with JsonSession(timeout=30) as session:
+                for org_name in orgs:
+                    client = GithubOrgClient(org_name, session, per_page=50)
+                    client.ORG_URL = fake.org_url
+                    client.public_repos()
+
+        async def async_scan() -> None:
+            async with AsyncGithubOrgClient(max_concurrency=20,
+                                            per_page=50) as client:
+                client.ORG_URL = fake.org_url
+                await client.public_repos_by_org(orgs)
+
+        sync_time = timed(sync_scan)
+        async_time = timed(lambda: asyncio.run(async_scan()))
+
+    print("sync client:  {:.3f}s".format(sync_time))
+    print("async client: {:.3f}s ({:.1f}x)".format(
+        async_time, sync_time / async_time))
+
+
+def bench_license_index() -> None:
+    """Five license lookups on a 50k repo org: full scans vs the index"""
+    payload = synthetic_repos("big", 50000)
+    licenses = ["mit", "apache-2.0", "bsd-3-clause", "gpl-3.0", "mit"]
+
+    def scan() -> None:
+        for key in licenses:
+            [repo["name"] for repo in payload
+             if GithubOrgClient.has_license(repo, key)]
+
+    # Repo records are built up front: only the index build and the
+    # lookups are timed, as the scans work on the payload directly
+    client = GithubOrgClient("big")
+    with patch("client.get_json", return_value=payload), \
+            patch.object(GithubOrgClient, "_public_repos_url"):
+        client.repos
+
+    def indexed() -> None:
+        client._indexes_of = None
+        for key in licenses:
+            client.public_repos(key)
+
+    scan_time = timed(scan)
+    index_time = timed(indexed)
+    print("per-call scans: {:.3f}s".format(scan_time))
+    print("license index:  {:.3f}s ({:.1f}x)".format(
+        index_time, scan_time / index_time))
+
+
+def bench_access_path() -> None:
+    """("license", "key") on 200k repos: access_nested_map vs compile_path"""
+    payload = synthetic_repos("big", 200000)
+    path = ("license", "key")
+
+    def nested() -> None:
+        for repo in payload:
+            try:
+                access_nested_map(repo, path)
+            except KeyError:
+                pass
+
+    accessor = compile_path(path, default=None)
+
+    def compiled() -> None:
+        for repo in payload:
+            accessor(repo)
+
+    nested_time = timed(nested)
+    compiled_time = timed(compiled)
+    batch_time = timed(lambda: extract_path(payload, path, default=None))
+    print("access_nested_map: {:.3f}s".format(nested_time))
+    print("compile_path:      {:.3f}s ({:.1f}x)".format(
+        compiled_time, nested_time / compiled_time))
+    print("extract_path:      {:.3f}s ({:.1f}x)".format(
+        batch_time, nested_time / batch_time))
+
+
+def fixture_repos(count: int) -> List[Dict]:
+    """`count` full repo dicts shaped like the fixtures.TEST_PAYLOAD repos"""
+    templates = TEST_PAYLOAD[0][1]
+    repos = []
+    for i in range(count):
+        repo = copy.deepcopy(templates[i % len(templates)])
+        repo["id"] = i
+        repo["name"] = "{}-{}".format(repo["name"], i)
+        repos.append(repo)
+    return repos
+
+
+def peak_memory(fn: Callable) -> int:
+    """Peak bytes allocated during one call of `fn`"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_streaming() -> None:
+    """Peak memory of a 10k fixture-shaped repos payload, full vs streamed"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with open(os.path.join(tmpdir, "repos.json"), "w") as f:
+            json.dump(fixture_repos(10000), f)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        # A separate process keeps the server's memory out of the trace
+        server = subprocess.Popen(
+            [sys.executable, "-m", "http.server", str(port),
+             "--bind", "127.0.0.1", "--directory", tmpdir],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            url = "http://127.0.0.1:{}/repos.json".format(port)
+            for _ in range(50):
+                try:
+                    socket.create_connection(("127.0.0.1", port)).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            full = peak_memory(lambda: get_json(url))
+            streamed = peak_memory(lambda: get_json(
+                url, fields=GithubOrgClient.PUBLIC_REPOS_FIELDS))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print("response.json(): {:.1f} MiB".format(full / 2 ** 20))
+    print("streamed fields: {:.1f} MiB ({:.1f}x less)".format(
+        streamed / 2 ** 20, full / streamed))
+
+
+def retained_memory(build: Callable) -> Tuple[int, object]:
+    """Bytes still allocated once `build` returns, and its result"""
+    tracemalloc.start()
+    try:
+        result = build()
+        return tracemalloc.get_traced_memory()[0], result
+    finally:
+        tracemalloc.stop()
+
+
+def bench_repo_records() -> None:
+    """Resident size of 10k fixture-shaped repos: dicts vs Repo records"""
+    text = json.dumps(fixture_repos(10000))
+
+    dict_bytes, payload = retained_memory(lambda: json.loads(text))
+    record_bytes, records = retained_memory(
+        lambda: tuple(map(Repo.from_payload, json.loads(text))))
+
+    def filter_dicts() -> None:
+        [repo["name"] for repo in payload
+         if GithubOrgClient.has_license(repo, "apache-2.0")]
+
+    def filter_records() -> None:
+        [repo.name for repo in records if repo.license == "apache-2.0"]
+
+    dict_time = timed(filter_dicts)
+    record_time = timed(filter_records)
+    print("payload dicts: {:.1f} MiB, filter {:.2f}ms".format(
+        dict_bytes / 2 ** 20, dict_time * 1000))
+    print("Repo records:  {:.1f} MiB ({:.0f}x less), filter {:.2f}ms "
+          "({:.1f}x)".format(record_bytes / 2 ** 20,
+                             dict_bytes / record_bytes, record_time * 1000,
+                             dict_time / record_time))
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "async_client": bench_async_client,
+    "license_index": bench_license_index,
+    "access_path": bench_access_path,
+    "streaming": bench_streaming,
+    "repo_records": bench_repo_records,
+}
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        print("== {} ==".format(name))
+        BENCHMARKS[name]()
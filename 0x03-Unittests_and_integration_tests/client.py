@@ -2,58 +2,182 @@
 #!/usr/bin/env python3
 """A github org client
 """
+import inspect
+import sys
 from typing import (
     List,
     Dict,
+    Iterable,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
 )
 
 from utils import (
     get_json,
-    access_nested_map,
-    memoize,
+    compile_path,
+    memoize_locked,
+    MemoizedProperty,
+    JsonSession,
+    get_json_pages,
 )
 
+repo_license_key = compile_path(("license", "key"), default=None)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Intern short, often repeated strings such as license keys"""
+    return sys.intern(value) if type(value) is str else value
+
+
+class Repo(NamedTuple):
+    """Compact record of a public repo"""
+    name: str
+    license: Optional[str] = None
+    fork: bool = False
+    stars: int = 0
+    forks: int = 0
+    archived: bool = False
+    language: Optional[str] = None
+
+    @classmethod
+    def from_payload(cls, repo: Dict) -> "Repo":
+        """Build a record from a GitHub repo payload"""
+        return cls(
+            repo["name"],
+            _intern(repo_license_key(repo)),
+            repo.get("fork", False),
+            repo.get("stargazers_count", 0),
+            repo.get("forks_count", 0),
+            repo.get("archived", False),
+            _intern(repo.get("language")),
+        )
+
 
 class GithubOrgClient:
     """A Githib org client
     """
     ORG_URL = "https://api.github.com/orgs/{org}"
+    PUBLIC_REPOS_FIELDS = ("name", ("license", "key"))
+    REPO_FIELDS = ("name", ("license", "key"), "fork", "stargazers_count",
+                   "forks_count", "archived", "language")
 
-    def __init__(self, org_name: str) -> None:
-        """Init method of GithubOrgClient"""
+    def __init__(
+        self,
+        org_name: str,
+        session: JsonSession = None,
+        per_page: int = 100,
+        max_workers: int = 4,
+        repo_fields: Sequence = None,
+    ) -> None:
+        """Init method of GithubOrgClient.
+        `session` routes requests through a pooled `JsonSession` and makes
+        `repos_payload` follow pagination, fetching up to `max_workers`
+        pages of `per_page` repos at a time; without it every request is a
+        one-off `requests.get` of the first page.
+        `repo_fields` streams the repos payload and keeps only those key
+        paths of each repo, e.g. `PUBLIC_REPOS_FIELDS` for `public_repos`
+        or `REPO_FIELDS` for full `Repo` records.
+        """
         self._org_name = org_name
+        self._session = session
+        self._per_page = per_page
+        self._max_workers = max_workers
+        self._repo_fields = repo_fields
 
-    @memoize
+    def _get_json(self, url: str) -> Dict:
+        """Get JSON through the client's session, if any"""
+        if self._session is None:
+            return get_json(url)
+        return get_json(url, self._session)
+
+    @memoize_locked
     def org(self) -> Dict:
         """Memoize org"""
-        return get_json(self.ORG_URL.format(org=self._org_name))
+        return self._get_json(self.ORG_URL.format(org=self._org_name))
 
     @property
     def _public_repos_url(self) -> str:
         """Public repos URL"""
         return self.org["repos_url"]
 
-    @memoize
-    def repos_payload(self) -> Dict:
+    def _fetch_repos_payload(self) -> List[Dict]:
+        """Fetch the repos payload"""
+        if self._session is None and self._repo_fields is None:
+            return get_json(self._public_repos_url)
+        if self._session is None:
+            return get_json(self._public_repos_url, fields=self._repo_fields)
+        return get_json_pages(self._public_repos_url, self._session,
+                              per_page=self._per_page,
+                              max_workers=self._max_workers,
+                              fields=self._repo_fields)
+
+    @memoize_locked
+    def repos_payload(self) -> List[Dict]:
         """Memoize repos payload"""
-        return get_json(self._public_repos_url)
+        return self._fetch_repos_payload()
+
+    @memoize_locked
+    def repos(self) -> Tuple[Repo, ...]:
+        """Memoize the repos as compact `Repo` records.
+        Built from `repos_payload` when it is already memoized (or
+        patched); otherwise fetched on their own, so the raw payload is
+        dropped as soon as the records are built.
+        """
+        payload = inspect.getattr_static(type(self), "repos_payload")
+        if (not isinstance(payload, MemoizedProperty)
+                or payload.is_memoized(self)):
+            return tuple(map(Repo.from_payload, self.repos_payload))
+        return tuple(map(Repo.from_payload, self._fetch_repos_payload()))
+
+    def refresh(self) -> None:
+        """Drop the memoized org and repos payloads so the next access
+        fetches them again.
+        """
+        type(self).org.invalidate(self)
+        type(self).repos_payload.invalidate(self)
+        type(self).repos.invalidate(self)
+
+    def _indexes(self) -> Tuple[Dict[str, List[str]], Dict[str, Repo]]:
+        """License key -> repo names and repo name -> repo indexes.
+        Built in one pass the first time they are needed and rebuilt only
+        when `repos` is a different object.
+        """
+        repos = self.repos
+        built = getattr(self, "_indexes_of", None)
+        if built is None or built[0] is not repos:
+            by_license: Dict[str, List[str]] = {}
+            by_name: Dict[str, Repo] = {}
+            for repo in repos:
+                by_name[repo.name] = repo
+                if repo.license is not None:
+                    by_license.setdefault(repo.license, []).append(repo.name)
+            built = (repos, by_license, by_name)
+            self._indexes_of = built
+        return built[1], built[2]
 
     def public_repos(self, license: str = None) -> List[str]:
         """Public repos"""
-        json_payload = self.repos_payload
-        public_repos = [
-            repo["name"] for repo in json_payload
-            if license is None or self.has_license(repo, license)
-        ]
+        if license is None:
+            return [repo.name for repo in self.repos]
+        by_license, _ = self._indexes()
+        return list(by_license.get(license, ()))
+
+    def public_repos_by_licenses(
+        self, licenses: Iterable[str]
+    ) -> Dict[str, List[str]]:
+        """Public repos for each license key in `licenses`"""
+        by_license, _ = self._indexes()
+        return {key: list(by_license.get(key, ())) for key in licenses}
 
-        return public_repos
+    def repo(self, name: str) -> Repo:
+        """Record of the public repo called `name`"""
+        _, by_name = self._indexes()
+        return by_name[name]
 
     @staticmethod
     def has_license(repo: Dict[str, Dict], license_key: str) -> bool:
         """Static: has_license"""
         assert license_key is not None, "license_key cannot be None"
-        try:
-            has_license = access_nested_map(repo, ("license", "key")) == license_key
-        except KeyError:
-            return False
-        return has_license
+        return repo_license_key(repo) == license_key
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""A local fake of the GitHub orgs API for tests, benchmarks and load tests
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any,
+    Dict,
+    List,
+    Tuple,
+)
+from urllib.parse import urlsplit, parse_qsl
+
+from fixtures import TEST_PAYLOAD
+
+
+def synthetic_repos(org_name: str, count: int) -> List[Dict]:
+    """Build `count` minimal repo dicts for `org_name`"""
+    licenses = ["mit", "apache-2.0", "bsd-3-clause", None]
+    return [
+        {
+            "name": "{}-repo-{}".format(org_name, i),
+            "license": (
+                {"key": licenses[i % 4]} if licenses[i % 4] else None
+            ),
+        }
+        for i in range(count)
+    ]
+
+
+def fixture_orgs(scale: int = 1) -> Dict[str, List[Dict]]:
+    """The fixtures.TEST_PAYLOAD org, its repos repeated `scale` times.
+    Repeated repos get a numeric suffix so every name stays unique.
+    """
+    repos = TEST_PAYLOAD[0][1]
+    if scale == 1:
+        return {"google": repos}
+    return {"google": [
+        dict(repo, name="{}-{}".format(repo["name"], copy))
+        for copy in range(scale) for repo in repos
+    ]}
+
+
+class _FakeGithubHandler(BaseHTTPRequestHandler):
+    """Answer /orgs/<org> and paginated /orgs/<org>/repos"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        """Serve an org or one page of its repos"""
+        fake = self.server.fake
+        fake.begin(self.path)
+        try:
+            self._serve(fake)
+        except Exception:
+            fake.end(500)
+            raise
+
+    def _serve(self, fake: "FakeGithubServer") -> None:
+        """Route the request"""
+        parts = urlsplit(self.path)
+        segments = parts.path.strip("/").split("/")
+
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        if len(segments) < 2 or segments[0] != "orgs" or \
+                segments[1] not in fake.orgs:
+            self._send(404, {"message": "Not Found"})
+        elif len(segments) == 2:
+            self._send(200, {
+                "login": segments[1],
+                "repos_url": "{}/orgs/{}/repos".format(fake.url, segments[1]),
+            })
+        elif len(segments) == 3 and segments[2] == "repos":
+            self._send_page(segments[1], dict(parse_qsl(parts.query)))
+        else:
+            self._send(404, {"message": "Not Found"})
+
+    def _send_page(self, org_name: str, query: Dict[str, str]) -> None:
+        """Serve one page of repos with a GitHub style Link header"""
+        fake = self.server.fake
+        repos = fake.orgs[org_name]
+        per_page = int(query.get("per_page", fake.per_page))
+        page = int(query.get("page", 1))
+        last = max(1, -(-len(repos) // per_page))
+
+        template = '<{}/orgs/{}/repos?per_page={}&page={{}}>; rel="{{}}"'
+        template = template.format(fake.url, org_name, per_page)
+        links = []
+        if page < last:
+            links.append(template.format(page + 1, "next"))
+            if fake.advertise_last:
+                links.append(template.format(last, "last"))
+        if page > 1:
+            links.append(template.format(page - 1, "prev"))
+            links.append(template.format(1, "first"))
+
+        start = (page - 1) * per_page
+        headers = {"Link": ", ".join(links)} if links else {}
+        self._send(200, repos[start:start + per_page], headers)
+
+    def _send(self, status: int, payload: Any,
+              headers: Dict[str, str] = None) -> None:
+        """Write `payload` as a JSON response, honouring If-None-Match and
+        the rate limit. The request is logged as done before the response
+        goes out, so clients never see stats lag behind their responses.
+        """
+        fake = self.server.fake
+        body = json.dumps(payload).encode()
+        headers = dict(headers or {})
+        etag = None
+        if fake.etags and status == 200:
+            etag = '"{}"'.format(hashlib.sha1(body).hexdigest()[:16])
+            headers["ETag"] = etag
+
+        not_modified = etag is not None and \
+            self.headers.get("If-None-Match") == etag
+        allowed, rate_headers = fake.take_quota(counted=not not_modified)
+        headers.update(rate_headers)
+        if not allowed:
+            status, not_modified = 403, False
+            body = json.dumps({"message": "API rate limit exceeded"}).encode()
+            headers.pop("ETag", None)
+        elif not_modified:
+            status, body = 304, b""
+
+        fake.end(status)
+        self.send_response(status)
+        if body:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Keep the server quiet"""
+
+
+class FakeGithubServer:
+    """A local HTTP server that mimics the GitHub orgs API.
+    It serves the fixture org or scaled-up synthetic orgs, with optional
+    latency, `Link` pagination, ETags answered with 304s, and a rate limit
+    reported through `X-RateLimit-*` headers and enforced with 403s.
+    Example
+    -------
+    >>> with FakeGithubServer(fixture_orgs(), latency=0.05) as fake:
+    ...     client = GithubOrgClient("google")
+    ...     client.ORG_URL = fake.org_url
+    ...     repos = client.public_repos()
+    ...     fake.stats()["requests"]
+    2
+    """
+
+    def __init__(
+        self,
+        orgs: Dict[str, List[Dict]],
+        latency: float = 0,
+        per_page: int = 30,
+        etags: bool = False,
+        rate_limit: int = None,
+        rate_window: float = 3600,
+        advertise_last: bool = True,
+    ) -> None:
+        """Init method of FakeGithubServer.
+        Parameters
+        ----------
+        orgs: dict
+            repos payload served for each org name
+        latency: float
+            seconds every response is delayed by
+        per_page: int
+            page size used when a request does not ask for one
+        etags: bool
+            send ETags and answer matching If-None-Match with 304
+        rate_limit: int
+            requests allowed per `rate_window` seconds; 304s are free, as on
+            GitHub, and no limit is enforced by default
+        rate_window: float
+            length of the rate limit window in seconds
+        advertise_last: bool
+            include `rel="last"` in the Link header of paginated responses
+        """
+        self.orgs = orgs
+        self.latency = latency
+        self.per_page = per_page
+        self.etags = etags
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.advertise_last = advertise_last
+        self.paths: List[str] = []
+        self._statuses: Counter = Counter()
+        self._active = 0
+        self._peak = 0
+        self._used = 0
+        self._reset_at = time.time() + rate_window
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server"""
+        return "http://127.0.0.1:{}".format(self._server.server_port)
+
+    @property
+    def org_url(self) -> str:
+        """Template to use as `GithubOrgClient.ORG_URL`"""
+        return self.url + "/orgs/{org}"
+
+    def begin(self, path: str) -> None:
+        """Log a request and count it in flight"""
+        with self._lock:
+            self.paths.append(path)
+            self._active += 1
+            self._peak = max(self._peak, self._active)
+
+    def end(self, status: int) -> None:
+        """Log the status a request was answered with"""
+        with self._lock:
+            self._active -= 1
+            self._statuses[status] += 1
+
+    def take_quota(self, counted: bool = True) -> Tuple[bool, Dict[str, str]]:
+        """Spend one request of the rate limit.
+        Returns whether the request is allowed and the headers describing
+        the remaining quota.
+        """
+        if self.rate_limit is None:
+            return True, {}
+        with self._lock:
+            now = time.time()
+            if now >= self._reset_at:
+                self._used = 0
+                self._reset_at = now + self.rate_window
+            allowed = not counted or self._used < self.rate_limit
+            if allowed and counted:
+                self._used += 1
+            headers = {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": str(self.rate_limit - self._used),
+                "X-RateLimit-Used": str(self._used),
+                "X-RateLimit-Reset": "{:.3f}".format(self._reset_at),
+            }
+        return allowed, headers
+
+    def stats(self) -> Dict[str, Any]:
+        """Request counts served so far"""
+        with self._lock:
+            return {
+                "requests": len(self.paths),
+                "statuses": dict(self._statuses),
+                "not_modified": self._statuses[304],
+                "rate_limited": self._statuses[403],
+                "peak_concurrency": self._peak,
+            }
+
+    def reset(self) -> None:
+        """Forget the served requests and restore the full quota"""
+        with self._lock:
+            self.paths.clear()
+            self._statuses.clear()
+            self._peak = self._active
+            self._used = 0
+            self._reset_at = time.time() + self.rate_window
+
+    def start(self) -> "FakeGithubServer":
+        """Start serving on a free local port"""
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                           _FakeGithubHandler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeGithubServer":
+        """Start the server on entry"""
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Stop the server on exit"""
+        self.stop()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Load tests of the github org client against a local fake GitHub API.
+Usage: ./load_test.py [name ...]  (runs every scenario by default)
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Callable,
+    Dict,
+    List,
+)
+
+from client import GithubOrgClient
+from fake_github import FakeGithubServer, fixture_orgs, synthetic_repos
+from rate_limit import RateLimiter
+from utils import JsonSession
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """The `pct` percentile of `samples`, nearest rank"""
+    ordered = sorted(samples)
+    index = max(0, -(-len(ordered) * pct // 100) - 1)
+    return ordered[int(index)]
+
+
+def drive(
+    fake: FakeGithubServer,
+    org_names: List[str],
+    session: JsonSession,
+    workers: int = 1,
+) -> List[float]:
+    """Call `public_repos` once per entry of `org_names`; returns the
+    seconds each call took.
+    """
+    def one(org_name: str) -> float:
+        client = GithubOrgClient(org_name, session)
+        client.ORG_URL = fake.org_url
+        start = time.perf_counter()
+        client.public_repos("apache-2.0")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(one, org_names))
+
+
+def report(fake: FakeGithubServer, latencies: List[float],
+           elapsed: float) -> None:
+    """Print request counts, throughput and latency percentiles"""
+    stats = fake.stats()
+    print("clients: {}, requests: {}, 304s: {}, 403s: {}, peak "
+          "concurrency: {}".format(len(latencies), stats["requests"],
+                                   stats["not_modified"],
+                                   stats["rate_limited"],
+                                   stats["peak_concurrency"]))
+    print("throughput: {:.1f} clients/s, {:.1f} requests/s".format(
+        len(latencies) / elapsed, stats["requests"] / elapsed))
+    print("latency: p50 {:.1f}ms, p95 {:.1f}ms, max {:.1f}ms".format(
+        percentile(latencies, 50) * 1000, percentile(latencies, 95) * 1000,
+        max(latencies) * 1000))
+
+
+def load_fixture_etags() -> None:
+    """The fixture org scaled up, polled repeatedly over one session"""
+    with FakeGithubServer(fixture_orgs(scale=200), latency=0.005,
+                          per_page=100, etags=True) as fake:
+        with JsonSession(timeout=30) as session:
+            start = time.perf_counter()
+            latencies = drive(fake, ["google"] * 20, session)
+            report(fake, latencies, time.perf_counter() - start)
+
+
+def load_many_orgs() -> None:
+    """Hundreds of synthetic orgs scanned from a thread pool"""
+    orgs = {
+        "org{}".format(i): synthetic_repos("org{}".format(i), 250)
+        for i in range(200)
+    }
+    with FakeGithubServer(orgs, latency=0.01, per_page=100) as fake:
+        with JsonSession(pool_size=16, timeout=30) as session:
+            start = time.perf_counter()
+            latencies = drive(fake, list(orgs), session, workers=16)
+            report(fake, latencies, time.perf_counter() - start)
+
+
+def load_rate_limited() -> None:
+    """Orgs scanned under a tight server quota with a RateLimiter"""
+    orgs = {
+        "org{}".format(i): synthetic_repos("org{}".format(i), 50)
+        for i in range(20)
+    }
+    with FakeGithubServer(orgs, latency=0.005, per_page=100,
+                          rate_limit=25, rate_window=1) as fake:
+        limiter = RateLimiter(rate=100, burst=10)
+        with JsonSession(timeout=30, rate_limiter=limiter) as session:
+            start = time.perf_counter()
+            latencies = drive(fake, list(orgs), session, workers=4)
+            report(fake, latencies, time.perf_counter() - start)
+        metrics = limiter.metrics()
+        print("limiter: {} delayed, {} retries, max wait {:.1f}ms".format(
+            metrics["delayed_requests"], metrics["rate_limited_retries"],
+            metrics["max_wait"] * 1000))
+
+
+SCENARIOS: Dict[str, Callable[[], None]] = {
+    "fixture_etags": load_fixture_etags,
+    "many_orgs": load_many_orgs,
+    "rate_limited": load_rate_limited,
+}
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or SCENARIOS:
+        print("== {} ==".format(name))
+        SCENARIOS[name]()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""A rate-limit aware request scheduler for the GitHub API
+"""
+import math
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import (
+    Dict,
+    Mapping,
+    Optional,
+)
+
+__all__ = [
+    "RateLimiter",
+]
+
+
+def parse_retry_after(value: str) -> Optional[float]:
+    """Seconds to wait from a `Retry-After` header, given either as a
+    number of seconds or as an HTTP-date; None when it is neither.
+    """
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Token bucket that spreads requests under the GitHub rate limit.
+    Every request takes a token first; tokens refill at `rate` per second,
+    lowered to whatever the `X-RateLimit-Remaining`/`X-RateLimit-Reset`
+    headers of the last response leave until the window resets. When the
+    quota is spent, or a 403/429 asks to back off, callers queue until
+    the server allows requests again instead of failing.
+    Example
+    -------
+    >>> limiter = RateLimiter.shared()
+    >>> session = JsonSession(rate_limiter=limiter)
+    """
+    _shared: Optional["RateLimiter"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 10,
+        max_retries: int = 3,
+    ) -> None:
+        """Init method of RateLimiter.
+        Parameters
+        ----------
+        rate: float
+            highest number of requests per second
+        burst: int
+            number of requests that may go out back to back
+        max_retries: int
+            times a rate limited request is retried before giving up
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self._tokens = float(burst)
+        self._header_rate: Optional[float] = None
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        self._waiting = 0
+        self._max_waiting = 0
+        self._acquired = 0
+        self._waited = 0
+        self._total_wait = 0.0
+        self._longest_wait = 0.0
+        self._retries = 0
+
+    @classmethod
+    def shared(cls) -> "RateLimiter":
+        """The process wide limiter shared by every client"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _current_rate(self) -> float:
+        """Refill rate after the rate-limit headers are applied"""
+        if self._header_rate is None:
+            return self.rate
+        return min(self.rate, self._header_rate)
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last refill"""
+        earned = (now - self._updated) * self._current_rate()
+        self._tokens = min(float(self.burst), self._tokens + earned)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Block until a request may go out; returns the seconds waited"""
+        start = time.monotonic()
+        with self._cond:
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now < self._paused_until:
+                        delay = self._paused_until - now
+                    elif self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    else:
+                        delay = (1 - self._tokens) / self._current_rate()
+                    self._cond.wait(delay)
+            finally:
+                self._waiting -= 1
+
+            waited = time.monotonic() - start
+            self._acquired += 1
+            if waited > 0.001:
+                self._waited += 1
+            self._total_wait += waited
+            self._longest_wait = max(self._longest_wait, waited)
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Hold every request back for `seconds`"""
+        with self._cond:
+            self._paused_until = max(self._paused_until,
+                                     time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def update(
+        self, status: int, headers: Mapping[str, str]
+    ) -> Optional[float]:
+        """Adjust to the rate-limit headers of a response.
+        Returns the seconds to wait before retrying when the response was
+        rate limited, None when it went through.
+        """
+        # Malformed rate-limit headers are ignored, not fatal
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+        except (KeyError, TypeError, ValueError):
+            remaining = None
+        try:
+            reset = float(headers["X-RateLimit-Reset"])
+            if not math.isfinite(reset):
+                raise ValueError(reset)
+            until_reset = max(0.0, reset - time.time())
+        except (KeyError, TypeError, ValueError):
+            until_reset = None
+
+        with self._cond:
+            self._refill(time.monotonic())
+            if remaining is not None and until_reset is not None:
+                # Spread what is left of the quota over the window
+                self._header_rate = max(remaining, 1) / max(until_reset, 1)
+                self._tokens = min(self._tokens, float(remaining))
+
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None:
+            retry_after = parse_retry_after(retry_after)
+        if status not in (403, 429):
+            delay = None
+        elif retry_after is not None:
+            delay = retry_after
+        elif remaining == 0 and until_reset is not None:
+            delay = until_reset
+        elif status == 429:
+            delay = 1.0
+        else:
+            # A 403 without rate-limit signals is a real "forbidden"
+            delay = None
+
+        if delay is not None:
+            with self._cond:
+                self._retries += 1
+            self.pause(delay)
+        elif remaining == 0 and until_reset is not None:
+            self.pause(until_reset)
+        return delay
+
+    def metrics(self) -> Dict[str, float]:
+        """Queue depth and wait time statistics"""
+        with self._cond:
+            return {
+                "queue_depth": self._waiting,
+                "max_queue_depth": self._max_waiting,
+                "requests": self._acquired,
+                "delayed_requests": self._waited,
+                "total_wait": self._total_wait,
+                "max_wait": self._longest_wait,
+                "avg_wait": (self._total_wait / self._acquired
+                             if self._acquired else 0.0),
+                "rate_limited_retries": self._retries,
+            }
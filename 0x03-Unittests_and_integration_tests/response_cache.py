@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""A persistent HTTP response cache backed by SQLite
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import (
+    Any,
+    Dict,
+    NamedTuple,
+    Optional,
+)
+
+__all__ = [
+    "CachedResponse",
+    "ResponseCache",
+]
+
+
+class CachedResponse(NamedTuple):
+    """A cached JSON payload with the headers it was served with"""
+    payload: Any
+    headers: Dict[str, str]
+    stored_at: float
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers to revalidate the entry"""
+        validators = {}
+        if "etag" in self.headers:
+            validators["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            validators["If-Modified-Since"] = self.headers["last-modified"]
+        return validators
+
+
+class ResponseCache:
+    """HTTP response cache keyed by URL and stored in a SQLite file.
+    Entries are fresh for `ttl` seconds, and for `stale_while_revalidate`
+    more seconds they may be served while a refresh happens in the
+    background. Once the stored bodies exceed `max_bytes`, the least
+    recently used entries are evicted.
+    Example
+    -------
+    >>> cache = ResponseCache("github.sqlite", ttl=600)
+    >>> session = JsonSession(cache=cache)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 300,
+        max_bytes: int = 64 * 1024 * 1024,
+        stale_while_revalidate: float = 0,
+    ) -> None:
+        """Init method of ResponseCache.
+        Parameters
+        ----------
+        path: str
+            SQLite file holding the cache, created if missing
+        ttl: float
+            seconds an entry is served without asking the server
+        max_bytes: int
+            size cap of the stored bodies
+        stale_while_revalidate: float
+            seconds past `ttl` a stale entry may still be served while it
+            is refreshed in the background
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stale_while_revalidate = stale_while_revalidate
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.expanduser(path),
+                                     check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " url TEXT PRIMARY KEY,"
+                " body TEXT NOT NULL,"
+                " headers TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " stored_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at"
+                " ON responses (accessed_at)"
+            )
+
+    def close(self) -> None:
+        """Close the SQLite connection"""
+        self._conn.close()
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Cached response for `url`, whatever its age, or None"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT body, headers, stored_at FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE url = ?",
+                (time.time(), url)
+            )
+        return CachedResponse(json.loads(row[0]), json.loads(row[1]), row[2])
+
+    def set(self, url: str, payload: Any, headers: Dict[str, str]) -> None:
+        """Store `payload` for `url`, evicting old entries past the cap"""
+        body = json.dumps(payload)
+        headers = json.dumps({k.lower(): v for k, v in headers.items()})
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (url, body, headers, size, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (url, body, headers, len(body), now, now)
+            )
+            self._evict()
+
+    def refresh(self, url: str, headers: Dict[str, str]) -> None:
+        """Mark the entry for `url` as fresh again after a 304"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT headers FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return
+            merged = json.loads(row[0])
+            merged.update({k.lower(): v for k, v in headers.items()})
+            self._conn.execute(
+                "UPDATE responses SET headers = ?, stored_at = ?,"
+                " accessed_at = ? WHERE url = ?",
+                (json.dumps(merged), now, now, url)
+            )
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        """Whether `entry` may be served without asking the server"""
+        return time.time() - entry.stored_at < self.ttl
+
+    def is_usable_stale(self, entry: CachedResponse) -> bool:
+        """Whether stale `entry` may be served while being revalidated"""
+        age = time.time() - entry.stored_at
+        return age < self.ttl + self.stale_while_revalidate
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until under `max_bytes`"""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT url, size FROM responses ORDER BY accessed_at"
+        )
+        evicted = []
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((url,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE url = ?",
+                               evicted)
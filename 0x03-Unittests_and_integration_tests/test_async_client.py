@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Unit tests for async_client module."""
+
+import unittest
+from unittest.mock import AsyncMock, patch
+from async_client import AsyncGithubOrgClient
+from fake_github import FakeGithubServer, synthetic_repos
+
+
+class TestAsyncGithubOrgClient(unittest.IsolatedAsyncioTestCase):
+    """Test cases for AsyncGithubOrgClient against a local fake API."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start a fake API serving several orgs."""
+        cls.orgs = {
+            "org{}".format(i): synthetic_repos("org{}".format(i), 40 * i)
+            for i in range(1, 6)
+        }
+        cls.fake = FakeGithubServer(cls.orgs, latency=0.01).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the fake API."""
+        cls.fake.stop()
+
+    def setUp(self):
+        """Reset the request log."""
+        self.fake.paths.clear()
+
+    def _client(self, **kwargs):
+        """Build a client pointed at the fake API."""
+        client = AsyncGithubOrgClient(**kwargs)
+        client.ORG_URL = self.fake.org_url
+        return client
+
+    async def test_public_repos(self):
+        """Test public_repos follows every page of one org."""
+        async with self._client(per_page=30) as client:
+            repos = await client.public_repos("org4")
+
+        self.assertEqual(repos, [r["name"] for r in self.orgs["org4"]])
+        # One org request plus 160 repos in pages of 30
+        self.assertEqual(len(self.fake.paths), 7)
+
+    async def test_repos_url_with_query(self):
+        """Test per_page is added to a repos_url that has a query."""
+        org = {"repos_url": self.fake.url + "/orgs/org4/repos?type=all"}
+        async with self._client(per_page=40) as client:
+            with patch.object(client, "org", AsyncMock(return_value=org)):
+                repos = await client.public_repos("org4")
+
+        self.assertEqual(repos, [r["name"] for r in self.orgs["org4"]])
+        # 160 repos in pages of 40, not the server default of 30
+        self.assertEqual(len(self.fake.paths), 4)
+        self.assertIn("type=all", self.fake.paths[0])
+
+    async def test_public_repos_with_license(self):
+        """Test public_repos filters by license key."""
+        async with self._client() as client:
+            repos = await client.public_repos("org2", "mit")
+
+        expected = [r["name"] for r in self.orgs["org2"]
+                    if r["license"] and r["license"]["key"] == "mit"]
+        self.assertEqual(repos, expected)
+
+    async def test_iter_public_repos(self):
+        """Test results for many orgs stream in as they complete."""
+        async with self._client(max_concurrency=4) as client:
+            seen = [org async for org, _ in
+                    client.iter_public_repos(self.orgs)]
+            by_org = await client.public_repos_by_org(self.orgs)
+
+        self.assertCountEqual(seen, self.orgs)
+        self.assertEqual(by_org, {
+            org: [r["name"] for r in repos]
+            for org, repos in self.orgs.items()
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,8 +4,10 @@
 import unittest
 from unittest.mock import patch, Mock, PropertyMock
 from parameterized import parameterized, parameterized_class
-from client import GithubOrgClient
+from client import GithubOrgClient, Repo, repo_license_key
+from fake_github import FakeGithubServer, fixture_orgs
 from fixtures import TEST_PAYLOAD
+from utils import JsonSession
 
 
 class TestGithubOrgClient(unittest.TestCase):
@@ -68,6 +70,60 @@ class TestGithubOrgClient(unittest.TestCase):
             mock_repos_url.assert_called_once()
             mock_get_json.assert_called_once_with(expected_repos_url)
 
+    @patch('client.get_json')
+    def test_refresh(self, mock_get_json):
+        """Test refresh makes org and repos_payload fetch again."""
+        mock_get_json.side_effect = [
+            {"repos_url": "u"}, [{"name": "old", "license": None}],
+            {"repos_url": "u"}, [{"name": "new", "license": None}],
+        ]
+        client = GithubOrgClient("google")
+        self.assertEqual(client.public_repos(), ["old"])
+        self.assertEqual(client.public_repos(), ["old"])
+
+        client.refresh()
+        self.assertEqual(client.public_repos(), ["new"])
+        self.assertEqual(mock_get_json.call_count, 4)
+
+    @patch('client.get_json')
+    def test_public_repos_by_licenses(self, mock_get_json):
+        """Test the license index is built once and reused across calls."""
+        mock_get_json.return_value = [
+            {"name": "repo1", "license": {"key": "mit"}},
+            {"name": "repo2", "license": {"key": "apache-2.0"}},
+            {"name": "repo3", "license": None},
+            {"name": "repo4", "license": {"key": "mit"}},
+        ]
+
+        with patch.object(GithubOrgClient, '_public_repos_url',
+                          new_callable=PropertyMock), \
+                patch('client.repo_license_key',
+                      wraps=repo_license_key) as mock_key:
+            client = GithubOrgClient("google")
+            self.assertEqual(client.public_repos("mit"), ["repo1", "repo4"])
+            self.assertEqual(client.public_repos_by_licenses(
+                ["apache-2.0", "gpl-3.0"]),
+                {"apache-2.0": ["repo2"], "gpl-3.0": []})
+            self.assertEqual(client.repo("repo3").license, None)
+
+            self.assertEqual(mock_key.call_count, 4)
+            mock_get_json.assert_called_once()
+
+    @patch('client.get_json')
+    def test_public_repos_patched_payload(self, mock_get_json):
+        """Test public_repos honours a patched repos_payload."""
+        with patch.object(GithubOrgClient, 'repos_payload',
+                          new_callable=PropertyMock) as mock_payload:
+            mock_payload.return_value = [
+                {"name": "repo1", "license": {"key": "mit"}},
+                {"name": "repo2", "license": None},
+            ]
+            client = GithubOrgClient("google")
+            self.assertEqual(client.public_repos(), ["repo1", "repo2"])
+            self.assertEqual(client.public_repos("mit"), ["repo1"])
+            mock_payload.assert_called_once()
+        mock_get_json.assert_not_called()
+
     @parameterized.expand([
         ({"license": {"key": "my_license"}}, "my_license", True),
         ({"license": {"key": "other_license"}}, "my_license", False)
@@ -79,6 +135,34 @@ class TestGithubOrgClient(unittest.TestCase):
         self.assertEqual(result, expected)
 
 
+class TestRepo(unittest.TestCase):
+    """Test cases for the compact Repo record."""
+
+    def test_from_payload(self):
+        """Test a fixture repo payload becomes a compact record."""
+        payload = TEST_PAYLOAD[0][1][2]
+        repo = Repo.from_payload(payload)
+
+        self.assertEqual(repo.name, "dagger")
+        self.assertEqual(repo.license, "apache-2.0")
+        self.assertEqual(repo.stars, payload["stargazers_count"])
+        self.assertEqual(repo.fork, payload["fork"])
+        self.assertFalse(hasattr(repo, "__dict__"))
+
+    def test_license_interned(self):
+        """Test equal license keys share one string object."""
+        key = "".join(["apache", "-2.0"])
+        first = Repo.from_payload({"name": "a", "license": {"key": key}})
+        second = Repo.from_payload(
+            {"name": "b", "license": {"key": "".join(["apache-", "2.0"])}})
+        self.assertIs(first.license, second.license)
+
+    def test_missing_fields(self):
+        """Test projected payloads fall back to defaults."""
+        self.assertEqual(Repo.from_payload({"name": "a", "license": None}),
+                         Repo("a"))
+
+
 @parameterized_class([
     {
         "org_payload": TEST_PAYLOAD[0][0],
@@ -102,12 +186,15 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
             else:
                 return {}
 
+        def get_side_effect(url):
+            """Side effect function for mocked requests.get()"""
+            mock_response = Mock()
+            mock_response.json.return_value = get_json_side_effect(url)
+            return mock_response
+
         cls.get_patcher = patch('requests.get')
         cls.mock_get = cls.get_patcher.start()
-
-        mock_response = Mock()
-        mock_response.json.side_effect = get_json_side_effect
-        cls.mock_get.return_value = mock_response
+        cls.mock_get.side_effect = get_side_effect
 
     @classmethod
     def tearDownClass(cls):
@@ -127,5 +214,124 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
         self.assertEqual(repos, self.apache2_repos)
 
 
+@parameterized_class([
+    {
+        "expected_repos": TEST_PAYLOAD[0][2],
+        "apache2_repos": TEST_PAYLOAD[0][3]
+    }
+])
+class TestIntegrationFakeServer(unittest.TestCase):
+    """Integration tests for GithubOrgClient over HTTP to a fake API."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Serve the fixture org with ETags."""
+        cls.fake = FakeGithubServer(fixture_orgs(), etags=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the fake API."""
+        cls.fake.stop()
+
+    def setUp(self):
+        """Reset the request log."""
+        self.fake.reset()
+
+    def _client(self, session=None):
+        """Build a client pointed at the fake API."""
+        client = GithubOrgClient("google", session)
+        client.ORG_URL = self.fake.org_url
+        return client
+
+    def test_public_repos(self):
+        """Integration test for public_repos over plain requests.get."""
+        client = self._client()
+        self.assertEqual(client.public_repos(), self.expected_repos)
+        self.assertEqual(client.public_repos("apache-2.0"),
+                         self.apache2_repos)
+        self.assertEqual(self.fake.stats()["requests"], 2)
+
+    def test_revalidation_through_session(self):
+        """Integration test for 304 revalidation across clients."""
+        with JsonSession(timeout=5) as session:
+            for _ in range(3):
+                client = self._client(session)
+                self.assertEqual(client.public_repos("apache-2.0"),
+                                 self.apache2_repos)
+
+        stats = self.fake.stats()
+        self.assertEqual(stats["requests"], 6)
+        self.assertEqual(stats["not_modified"], 4)
+
+
+class TestPaginatedReposPayload(unittest.TestCase):
+    """Test repos_payload pagination against a local fake GitHub API."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start a fake API serving an org with thousands of repos."""
+        cls.repos = [
+            {"name": "repo-{}".format(i),
+             "license": {"key": "mit" if i % 3 else "apache-2.0"},
+             "owner": {"login": "big"}}
+            for i in range(2500)
+        ]
+        cls.fake = FakeGithubServer({"big": cls.repos}, latency=0.01).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the fake API."""
+        cls.fake.stop()
+
+    def setUp(self):
+        """Reset the request log and serve Link headers with rel=last."""
+        self.fake.reset()
+        self.fake.advertise_last = True
+
+    def _client(self, **kwargs):
+        """Build a client pointed at the fake API."""
+        client = GithubOrgClient("big", JsonSession(timeout=5), **kwargs)
+        client.ORG_URL = self.fake.org_url
+        return client
+
+    def test_all_pages_fetched_concurrently(self):
+        """Test every page is fetched, in order, with bounded concurrency."""
+        client = self._client(per_page=100, max_workers=4)
+        repos = client.public_repos()
+
+        self.assertEqual(repos, [r["name"] for r in self.repos])
+        # One org request plus 25 pages of 100 repos
+        stats = self.fake.stats()
+        self.assertEqual(stats["requests"], 26)
+        self.assertGreater(stats["peak_concurrency"], 1)
+        self.assertLessEqual(stats["peak_concurrency"], 4)
+
+    def test_repo_fields(self):
+        """Test streamed pages keep only the projected repo fields."""
+        client = self._client(
+            per_page=1000, repo_fields=GithubOrgClient.PUBLIC_REPOS_FIELDS)
+
+        self.assertEqual(client.repos_payload[:2], [
+            {"name": "repo-0", "license": {"key": "apache-2.0"}},
+            {"name": "repo-1", "license": {"key": "mit"}},
+        ])
+        self.assertEqual(len(client.public_repos("mit")), 1666)
+        # public_repos reuses the memoized payload: org + 3 pages, once
+        self.assertEqual(self.fake.stats()["requests"], 4)
+
+    def test_follows_next_links_without_last(self):
+        """Test pagination falls back to following rel=next links."""
+        self.fake.advertise_last = False
+        client = self._client(per_page=500)
+        repos = client.public_repos("apache-2.0")
+
+        expected = [r["name"] for r in self.repos
+                    if r["license"]["key"] == "apache-2.0"]
+        self.assertEqual(repos, expected)
+        stats = self.fake.stats()
+        self.assertEqual(stats["requests"], 6)
+        self.assertEqual(stats["peak_concurrency"], 1)
+
+
 if __name__ == '__main__':
     unittest.main()
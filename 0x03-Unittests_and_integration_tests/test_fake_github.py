@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Unit tests for fake_github module."""
+
+import time
+import unittest
+import requests
+from parameterized import parameterized
+from fake_github import FakeGithubServer, fixture_orgs, synthetic_repos
+from fixtures import TEST_PAYLOAD
+
+
+class TestFakeGithubServer(unittest.TestCase):
+    """Test cases for FakeGithubServer."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Serve the fixture org and a synthetic one."""
+        orgs = fixture_orgs()
+        orgs["big"] = synthetic_repos("big", 250)
+        cls.fake = FakeGithubServer(orgs, per_page=100).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the fake API."""
+        cls.fake.stop()
+
+    def setUp(self):
+        """Reset the request log and every option."""
+        self.fake.reset()
+        self.fake.etags = False
+        self.fake.rate_limit = None
+        self.fake.advertise_last = True
+
+    def test_fixture_org(self):
+        """Test the fixture org and repos are served unchanged."""
+        org = requests.get(self.fake.org_url.format(org="google")).json()
+        self.assertEqual(org["repos_url"],
+                         self.fake.url + "/orgs/google/repos")
+
+        repos = requests.get(org["repos_url"]).json()
+        self.assertEqual(repos, TEST_PAYLOAD[0][1])
+        self.assertEqual(self.fake.stats()["statuses"], {200: 2})
+
+    def test_unknown_org(self):
+        """Test an unknown org is a 404."""
+        response = requests.get(self.fake.org_url.format(org="nobody"))
+        self.assertEqual(response.status_code, 404)
+
+    @parameterized.expand([
+        (True, {"next", "last"}),
+        (False, {"next"}),
+    ])
+    def test_pagination(self, advertise_last, first_rels):
+        """Test pages come with GitHub style Link headers."""
+        self.fake.advertise_last = advertise_last
+        url = self.fake.url + "/orgs/big/repos"
+
+        first = requests.get(url)
+        self.assertEqual(len(first.json()), 100)
+        self.assertEqual(set(first.links), first_rels)
+
+        last = requests.get(url, params={"page": 3})
+        self.assertEqual(len(last.json()), 50)
+        self.assertEqual(set(last.links), {"prev", "first"})
+
+    def test_etags(self):
+        """Test a matching If-None-Match is answered with a 304."""
+        self.fake.etags = True
+        url = self.fake.url + "/orgs/google/repos"
+        etag = requests.get(url).headers["ETag"]
+
+        response = requests.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        response = requests.get(url, headers={"If-None-Match": '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.fake.stats()["not_modified"], 1)
+
+    def test_rate_limit(self):
+        """Test the quota is reported in headers and enforced with 403s."""
+        self.fake.rate_limit = 2
+        url = self.fake.org_url.format(org="google")
+
+        remaining = [requests.get(url).headers["X-RateLimit-Remaining"]
+                     for _ in range(2)]
+        self.assertEqual(remaining, ["1", "0"])
+
+        response = requests.get(url)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.headers["X-RateLimit-Remaining"], "0")
+        self.assertGreater(float(response.headers["X-RateLimit-Reset"]),
+                           time.time())
+        self.assertEqual(self.fake.stats()["rate_limited"], 1)
+
+    def test_not_modified_is_free(self):
+        """Test 304s do not use up the quota."""
+        self.fake.etags = True
+        self.fake.rate_limit = 1
+        url = self.fake.url + "/orgs/google/repos"
+        etag = requests.get(url).headers["ETag"]
+
+        for _ in range(3):
+            response = requests.get(url, headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 304)
+
+    def test_latency(self):
+        """Test every response is delayed by `latency`."""
+        self.fake.latency = 0.05
+        self.addCleanup(setattr, self.fake, "latency", 0)
+        start = time.monotonic()
+        requests.get(self.fake.org_url.format(org="google"))
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+
+
+class TestFixtureOrgs(unittest.TestCase):
+    """Test cases for fixture_orgs."""
+
+    def test_scale(self):
+        """Test scaled fixtures repeat the repos with unique names."""
+        repos = fixture_orgs(scale=3)["google"]
+        self.assertEqual(len(repos), 3 * len(TEST_PAYLOAD[0][1]))
+        self.assertEqual(len({repo["name"] for repo in repos}), len(repos))
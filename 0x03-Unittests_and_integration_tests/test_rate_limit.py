@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Unit tests for rate_limit module."""
+
+import json
+import threading
+import time
+import unittest
+from email.utils import formatdate
+from unittest.mock import patch
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from rate_limit import RateLimiter
+from utils import JsonSession
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    """Answer with the next scripted (status, headers) pair, then 200."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        """Serve the next scripted response."""
+        with self.server.lock:
+            self.server.times.append(time.monotonic())
+            script = self.server.script
+            status, headers = script.pop(0) if script else (200, {})
+        body = json.dumps({"ok": status == 200}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Keep test output quiet."""
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for RateLimiter."""
+
+    def test_shared(self):
+        """Test every caller gets the same process wide limiter."""
+        self.assertIs(RateLimiter.shared(), RateLimiter.shared())
+
+    def test_spreads_requests(self):
+        """Test requests past the burst are spaced out at `rate`."""
+        limiter = RateLimiter(rate=50, burst=2)
+        start = time.monotonic()
+        for _ in range(7):
+            limiter.acquire()
+        elapsed = time.monotonic() - start
+
+        self.assertGreaterEqual(elapsed, 0.09)
+        metrics = limiter.metrics()
+        self.assertEqual(metrics["requests"], 7)
+        self.assertEqual(metrics["delayed_requests"], 5)
+        self.assertGreater(metrics["max_wait"], 0)
+
+    def test_queue_depth(self):
+        """Test callers queue instead of failing when tokens run out."""
+        limiter = RateLimiter(rate=20, burst=1)
+        threads = [threading.Thread(target=limiter.acquire)
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        metrics = limiter.metrics()
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertGreater(metrics["max_queue_depth"], 1)
+
+    def test_headers_lower_rate(self):
+        """Test the remaining quota is spread over the reset window."""
+        limiter = RateLimiter(rate=100, burst=1)
+        delay = limiter.update(200, {
+            "X-RateLimit-Remaining": "10",
+            "X-RateLimit-Reset": str(time.time() + 100),
+        })
+        self.assertIsNone(delay)
+        self.assertAlmostEqual(limiter._current_rate(), 0.1, places=2)
+
+    def test_retry_after_http_date(self):
+        """Test Retry-After may be an HTTP-date instead of seconds."""
+        limiter = RateLimiter()
+        limiter.pause = lambda seconds: None
+        delay = limiter.update(429, {
+            "Retry-After": formatdate(time.time() + 30, usegmt=True),
+        })
+        self.assertAlmostEqual(delay, 30, delta=1.5)
+        self.assertEqual(limiter.update(429, {
+            "Retry-After": formatdate(time.time() - 30, usegmt=True),
+        }), 0)
+        # Unparseable values fall back to the other signals
+        self.assertEqual(limiter.update(429, {"Retry-After": "soon"}), 1.0)
+
+    def test_malformed_rate_headers(self):
+        """Test unparseable rate-limit headers are ignored."""
+        limiter = RateLimiter(rate=100, burst=1)
+        for remaining, reset in [("", ""), ("ten", "soon"),
+                                 ("10", "inf"), ("1.5", "1e3")]:
+            self.assertIsNone(limiter.update(200, {
+                "X-RateLimit-Remaining": remaining,
+                "X-RateLimit-Reset": reset,
+            }))
+        self.assertEqual(limiter._current_rate(), 100)
+        self.assertEqual(limiter.update(429, {
+            "X-RateLimit-Remaining": "", "X-RateLimit-Reset": "x",
+        }), 1.0)
+
+    def test_forbidden_without_rate_headers(self):
+        """Test a plain 403 is not treated as rate limiting."""
+        self.assertIsNone(RateLimiter().update(403, {}))
+
+
+class TestJsonSessionRateLimited(unittest.TestCase):
+    """Test JsonSession retries rate limited responses from a stub."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the scripted stub server."""
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), ScriptedHandler)
+        cls.server.lock = threading.Lock()
+        cls.url = "http://127.0.0.1:{}/orgs/google".format(
+            cls.server.server_port)
+        cls.thread = threading.Thread(target=cls.server.serve_forever,
+                                      daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the stub server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """Reset the script and request times."""
+        self.server.script = []
+        self.server.times = []
+
+    def test_retry_after_429(self):
+        """Test a 429 with Retry-After is retried after the delay."""
+        self.server.script = [(429, {"Retry-After": "0.2"})]
+        limiter = RateLimiter()
+        with JsonSession(timeout=5, rate_limiter=limiter) as session:
+            self.assertEqual(session.get_json(self.url), {"ok": True})
+
+        first, second = self.server.times
+        self.assertGreaterEqual(second - first, 0.2)
+        self.assertEqual(limiter.metrics()["rate_limited_retries"], 1)
+
+    def test_retry_after_http_date_429(self):
+        """Test a 429 with an HTTP-date Retry-After is retried too."""
+        self.server.script = [(429, {
+            "Retry-After": formatdate(time.time() + 0.5, usegmt=True),
+        })]
+        with JsonSession(timeout=5, rate_limiter=RateLimiter()) as session:
+            self.assertEqual(session.get_json(self.url), {"ok": True})
+        self.assertEqual(len(self.server.times), 2)
+
+    def test_streamed_retry_closes_response(self):
+        """Test a rate limited streamed response is closed before retrying."""
+        self.server.script = [(429, {"Retry-After": "0"})]
+        responses = []
+        with JsonSession(timeout=5, rate_limiter=RateLimiter()) as session:
+            get = session._session.get
+
+            def spy(*args, **kwargs):
+                """Record every response handed out."""
+                responses.append(get(*args, **kwargs))
+                return responses[-1]
+
+            with patch.object(session._session, "get", side_effect=spy):
+                with session._get(self.url, {}, stream=True) as response:
+                    self.assertEqual(response.status_code, 200)
+                    self.assertTrue(responses[0].raw.closed)
+                    self.assertFalse(response.raw.closed)
+
+    def test_exhausted_quota_403(self):
+        """Test a 403 with no remaining quota waits for the reset."""
+        self.server.script = [(403, {
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(time.time() + 0.3),
+        })]
+        limiter = RateLimiter()
+        with JsonSession(timeout=5, rate_limiter=limiter) as session:
+            self.assertEqual(session.get_json(self.url), {"ok": True})
+
+        first, second = self.server.times
+        self.assertGreaterEqual(second - first, 0.25)
+
+    def test_gives_up_after_max_retries(self):
+        """Test the error surfaces once retries are exhausted."""
+        self.server.script = [(429, {"Retry-After": "0"})] * 3
+        limiter = RateLimiter(max_retries=2)
+        with JsonSession(timeout=5, rate_limiter=limiter) as session:
+            with self.assertRaises(requests.HTTPError):
+                session.get_json(self.url)
+        self.assertEqual(len(self.server.times), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Unit tests for response_cache module."""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from fake_github import FakeGithubServer, synthetic_repos
+from response_cache import ResponseCache
+from utils import JsonSession
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for ResponseCache."""
+
+    def setUp(self):
+        """Create a scratch directory for the cache file."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "responses.sqlite")
+
+    def tearDown(self):
+        """Remove the scratch directory."""
+        shutil.rmtree(self.tmpdir)
+
+    def test_persists_across_instances(self):
+        """Test an entry written by one cache is read by the next."""
+        cache = ResponseCache(self.path)
+        cache.set("http://x/orgs/google", {"login": "google"},
+                  {"ETag": '"v1"'})
+        cache.close()
+
+        entry = ResponseCache(self.path).get("http://x/orgs/google")
+        self.assertEqual(entry.payload, {"login": "google"})
+        self.assertEqual(entry.validators, {"If-None-Match": '"v1"'})
+
+    def test_ttl(self):
+        """Test entries stop being fresh after ttl seconds."""
+        cache = ResponseCache(self.path, ttl=0.1, stale_while_revalidate=10)
+        cache.set("http://x/a", [1], {})
+        entry = cache.get("http://x/a")
+        self.assertTrue(cache.is_fresh(entry))
+
+        time.sleep(0.15)
+        self.assertFalse(cache.is_fresh(entry))
+        self.assertTrue(cache.is_usable_stale(entry))
+
+    def test_lru_eviction(self):
+        """Test the least recently used entries go first past max_bytes."""
+        cache = ResponseCache(self.path, max_bytes=250)
+        for name in "abc":
+            cache.set("http://x/" + name, "x" * 100, {})
+            time.sleep(0.01)
+        self.assertIsNone(cache.get("http://x/a"))
+
+        cache.get("http://x/b")
+        time.sleep(0.01)
+        cache.set("http://x/d", "x" * 100, {})
+        self.assertIsNotNone(cache.get("http://x/b"))
+        self.assertIsNone(cache.get("http://x/c"))
+
+
+class TestJsonSessionWithCache(unittest.TestCase):
+    """Test cases for JsonSession backed by a ResponseCache."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start a fake API."""
+        cls.fake = FakeGithubServer(
+            {"google": synthetic_repos("google", 10)}).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the fake API."""
+        cls.fake.stop()
+
+    def setUp(self):
+        """Create a scratch cache file and reset the request log."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "responses.sqlite")
+        self.url = self.fake.org_url.format(org="google")
+        self.fake.paths.clear()
+
+    def tearDown(self):
+        """Remove the scratch directory."""
+        shutil.rmtree(self.tmpdir)
+
+    def test_warm_start(self):
+        """Test a new session serves fresh entries without a request."""
+        with JsonSession(cache=ResponseCache(self.path)) as session:
+            first = session.get_json(self.url)
+        with JsonSession(cache=ResponseCache(self.path)) as session:
+            second = session.get_json(self.url)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.fake.paths), 1)
+
+    def test_stale_while_revalidate(self):
+        """Test a stale entry is served and refreshed in the background."""
+        cache = ResponseCache(self.path, ttl=0, stale_while_revalidate=60)
+        with JsonSession(cache=cache) as session:
+            session.get_json(self.url)
+            stored_at = cache.get(self.url).stored_at
+            self.assertEqual(session.get_json(self.url)["login"], "google")
+
+            for _ in range(100):
+                if cache.get(self.url).stored_at > stored_at:
+                    break
+                time.sleep(0.01)
+
+        self.assertGreater(cache.get(self.url).stored_at, stored_at)
+        self.assertEqual(len(self.fake.paths), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
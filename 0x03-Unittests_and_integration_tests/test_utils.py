@@ -1,10 +1,53 @@
 #!/usr/bin/env python3
 """Unit tests for utils module."""
 
+import json
+import threading
+import time
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, Mock
 from parameterized import parameterized
-from utils import access_nested_map, get_json, memoize
+from types import MappingProxyType
+from utils import (
+    access_nested_map,
+    compile_path,
+    extract_path,
+    iter_json_array,
+    get_json,
+    memoize,
+    memoize_locked,
+    JsonSession,
+)
+
+
+class StubJsonHandler(BaseHTTPRequestHandler):
+    """Serve a fixed JSON document with an ETag over keep-alive HTTP/1.1."""
+
+    protocol_version = "HTTP/1.1"
+    payload = {"repos_url": "https://api.github.com/orgs/google/repos"}
+    etag = '"v1"'
+
+    def do_GET(self):
+        """Answer with the payload, or 304 when the ETag matches."""
+        self.server.requests.append(
+            (self.client_address, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(self.payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Keep test output quiet."""
 
 
 class TestAccessNestedMap(unittest.TestCase):
@@ -31,6 +74,102 @@ class TestAccessNestedMap(unittest.TestCase):
         self.assertIn(str(path[-1]), str(context.exception))
 
 
+class TestCompilePath(unittest.TestCase):
+    """Test cases for compile_path and extract_path."""
+
+    @parameterized.expand([
+        ({"a": 1}, ("a",), 1),
+        ({"a": {"b": 2}}, ("a",), {"b": 2}),
+        ({"a": {"b": 2}}, ("a", "b"), 2),
+        (MappingProxyType({"a": {"b": 2}}), ("a", "b"), 2),
+    ])
+    def test_compile_path(self, nested_map, path, expected):
+        """Test the accessor matches access_nested_map."""
+        self.assertEqual(compile_path(path)(nested_map), expected)
+
+    @parameterized.expand([
+        ({}, ("a",)),
+        ({"a": 1}, ("a", "b"))
+    ])
+    def test_compile_path_exception(self, nested_map, path):
+        """Test a missing path raises KeyError without a default."""
+        with self.assertRaises(KeyError) as context:
+            compile_path(path)(nested_map)
+        self.assertIn(str(path[-1]), str(context.exception))
+
+    @parameterized.expand([
+        ({}, ("a",)),
+        ({"a": 1}, ("a", "b")),
+        ({"a": None}, ("a", "b")),
+    ])
+    def test_compile_path_default(self, nested_map, path):
+        """Test a missing path returns the default."""
+        self.assertEqual(compile_path(path, default="x")(nested_map), "x")
+
+    def test_extract_path(self):
+        """Test one path is extracted from many records."""
+        records = [{"license": {"key": "mit"}}, {"license": None}, {}]
+        self.assertEqual(
+            extract_path(records, ("license", "key"), default=None),
+            ["mit", None, None])
+
+
+class TestIterJsonArray(unittest.TestCase):
+    """Test cases for the incremental JSON array parser."""
+
+    document = [
+        {"name": "caf\u00e9", "license": {"key": "mit", "name": "MIT"},
+         "stars": 12345, "owner": {"login": "google"}},
+        {"name": "b", "license": None, "stars": 7.5},
+        [1, 2], "text", None, -3,
+    ]
+
+    def chunked(self, size):
+        """Encoded document split in `size` byte chunks."""
+        data = json.dumps(self.document, ensure_ascii=False).encode()
+        return [data[i:i + size] for i in range(0, len(data), size)]
+
+    @parameterized.expand([(1,), (2,), (7,), (4096,)])
+    def test_iter_json_array(self, size):
+        """Test items survive any chunk boundary, inside UTF-8 or numbers."""
+        self.assertEqual(list(iter_json_array(self.chunked(size))),
+                         self.document)
+
+    @parameterized.expand([
+        ([b"[1.", b"5, 2]"], [1.5, 2]),
+        ([b"[1e", b"3]"], [1000.0]),
+        ([b"[2, 1", b"E", b"-", b"2]"], [2, 0.01]),
+        ([b"[-", b"0.25", b"]"], [-0.25]),
+    ])
+    def test_number_split_across_chunks(self, chunks, expected):
+        """Test a number is not decoded before the chunk that ends it."""
+        self.assertEqual(list(iter_json_array(chunks)), expected)
+
+    def test_fields(self):
+        """Test items are reduced to the projected key paths."""
+        items = iter_json_array(self.chunked(5),
+                                fields=("name", ("license", "key")))
+        self.assertEqual(list(items)[:2], [
+            {"name": "caf\u00e9", "license": {"key": "mit"}},
+            {"name": "b", "license": None},
+        ])
+
+    def test_empty(self):
+        """Test an empty array yields nothing."""
+        self.assertEqual(list(iter_json_array([b" [ ", b"] "])), [])
+
+    @parameterized.expand([
+        ([b'{"a": 1}'],),
+        ([b'[1, 2'],),
+        ([b'[1 2]'],),
+        ([b'[1], 2'],),
+    ])
+    def test_invalid(self, chunks):
+        """Test malformed or truncated arrays raise ValueError."""
+        with self.assertRaises(ValueError):
+            list(iter_json_array(chunks))
+
+
 class TestGetJson(unittest.TestCase):
     """Test cases for get_json function."""
 
@@ -55,6 +194,69 @@ class TestGetJson(unittest.TestCase):
         self.assertEqual(result, test_payload)
 
 
+class TestJsonSession(unittest.TestCase):
+    """Test cases for JsonSession against a local stub HTTP server."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the stub server on a free local port."""
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubJsonHandler)
+        cls.server.requests = []
+        cls.url = "http://127.0.0.1:{}/orgs/google".format(
+            cls.server.server_port)
+        cls.thread = threading.Thread(target=cls.server.serve_forever,
+                                      daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the stub server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """Reset the recorded requests."""
+        self.server.requests.clear()
+
+    def test_get_json_with_session(self):
+        """Test get_json goes through the session when one is given."""
+        with JsonSession(timeout=5) as session:
+            self.assertEqual(get_json(self.url, session),
+                             StubJsonHandler.payload)
+
+    def test_conditional_request(self):
+        """Test an unchanged resource is revalidated with If-None-Match."""
+        with JsonSession(timeout=5) as session:
+            first = session.get_json(self.url)
+            second = session.get_json(self.url)
+
+        self.assertEqual(first, StubJsonHandler.payload)
+        self.assertEqual(second, StubJsonHandler.payload)
+        self.assertEqual([etag for _, etag in self.server.requests],
+                         [None, StubJsonHandler.etag])
+
+    def test_keep_alive(self):
+        """Test consecutive requests reuse one pooled connection."""
+        with JsonSession(pool_size=1, timeout=5) as session:
+            for _ in range(3):
+                session.get_json(self.url)
+
+        clients = {address for address, _ in self.server.requests}
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(clients), 1)
+
+    def test_timeout_is_passed(self):
+        """Test every request carries the configured timeout."""
+        session = JsonSession(timeout=1.5)
+        with patch.object(session._session, "get") as mock_get:
+            mock_get.return_value.status_code = 200
+            mock_get.return_value.headers = {}
+            mock_get.return_value.json.return_value = {}
+            session.get_json(self.url)
+        mock_get.assert_called_once_with(self.url, headers={}, stream=False,
+                                         timeout=1.5)
+
+
 class TestMemoize(unittest.TestCase):
     """Test cases for memoize decorator."""
 
@@ -85,5 +287,88 @@ class TestMemoize(unittest.TestCase):
             mock_method.assert_called_once()
 
 
+class TestMemoizeLocked(unittest.TestCase):
+    """Test cases for memoize_locked decorator."""
+
+    def test_single_computation_under_threads(self):
+        """Test concurrent first accesses compute the value once."""
+        calls = []
+
+        class TestClass:
+            @memoize_locked
+            def a_property(self):
+                calls.append(1)
+                time.sleep(0.05)
+                return 42
+
+        test_instance = TestClass()
+        barrier = threading.Barrier(8)
+        results = []
+
+        def access():
+            barrier.wait()
+            results.append(test_instance.a_property)
+
+        threads = [threading.Thread(target=access) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [42] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_ttl(self):
+        """Test the value is recomputed once the ttl has passed."""
+        class TestClass:
+            def a_method(self):
+                return 42
+
+            @memoize_locked(ttl=0.05)
+            def a_property(self):
+                return self.a_method()
+
+        test_instance = TestClass()
+        with patch.object(test_instance, 'a_method',
+                          return_value=42) as mock_method:
+            test_instance.a_property
+            test_instance.a_property
+            self.assertEqual(mock_method.call_count, 1)
+            time.sleep(0.06)
+            test_instance.a_property
+            self.assertEqual(mock_method.call_count, 2)
+
+    def test_invalidate(self):
+        """Test invalidate drops the value for one instance only."""
+        class TestClass:
+            def __init__(self, value):
+                self.value = value
+
+            @memoize_locked
+            def a_property(self):
+                return self.value
+
+        first, second = TestClass(1), TestClass(2)
+        self.assertEqual((first.a_property, second.a_property), (1, 2))
+        first.value = second.value = 3
+        TestClass.a_property.invalidate(first)
+        self.assertEqual((first.a_property, second.a_property), (3, 2))
+
+    def test_slots(self):
+        """Test classes with __slots__ work when they declare the slot."""
+        class TestClass:
+            __slots__ = ("_a_property",)
+
+            @memoize_locked
+            def a_property(self):
+                return 42
+
+        test_instance = TestClass()
+        self.assertEqual(test_instance.a_property, 42)
+        self.assertEqual(test_instance.a_property, 42)
+        with self.assertRaises(AttributeError):
+            test_instance.a_property = 1
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,20 +1,46 @@
 #!/usr/bin/env python3
 """Generic utilities for github org client.
 """
+import codecs
+import json
+import re
+import threading
+import time
 import requests
+from rate_limit import RateLimiter
+from response_cache import ResponseCache
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import parse_header_links
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 from typing import (
     Mapping,
     Sequence,
     Any,
     Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
     Callable,
+    Tuple,
+    Union,
 )
 
 __all__ = [
     "access_nested_map",
+    "compile_path",
+    "extract_path",
+    "iter_json_array",
     "get_json",
     "memoize",
+    "memoize_locked",
+    "MemoizedProperty",
+    "JsonSession",
+    "get_json_pages",
 ]
 
 
@@ -40,13 +66,419 @@ def access_nested_map(nested_map: Mapping, path: Sequence) -> Any:
     return nested_map
 
 
-def get_json(url: str) -> Dict:
+_MISSING = object()
+
+
+def compile_path(path: Sequence, default: Any = _MISSING) -> Callable:
+    """Compile a key path into a fast accessor for nested maps.
+    The accessor behaves like `access_nested_map` with the path bound, but
+    plain dicts skip the `Mapping` ABC check and, when `default` is given,
+    a missing key or non-map returns it instead of raising KeyError.
+    Parameters
+    ----------
+    path: Sequence
+        a sequence of key representing a path to the value
+    default: Any
+        value returned when the path does not resolve
+    Example
+    -------
+    >>> license_key = compile_path(("license", "key"), default=None)
+    >>> license_key({"license": {"key": "mit"}})
+    'mit'
+    >>> license_key({"license": None}) is None
+    True
+    """
+    keys = tuple(path)
+
+    def accessor(nested_map: Mapping) -> Any:
+        """Access the compiled path in `nested_map`"""
+        for key in keys:
+            if type(nested_map) is not dict and \
+                    not isinstance(nested_map, Mapping):
+                if default is _MISSING:
+                    raise KeyError(key)
+                return default
+            nested_map = nested_map.get(key, _MISSING)
+            if nested_map is _MISSING:
+                if default is _MISSING:
+                    raise KeyError(key)
+                return default
+        return nested_map
+
+    accessor.path = keys
+    return accessor
+
+
+def extract_path(
+    records: Iterable[Mapping], path: Sequence, default: Any = _MISSING
+) -> List:
+    """Access the same key path in every record at once.
+    Example
+    -------
+    >>> extract_path([{"a": {"b": 1}}, {"a": {}}], ("a", "b"), default=0)
+    [1, 0]
+    """
+    return list(map(compile_path(path, default), records))
+
+
+_DECODER = json.JSONDecoder()
+_NUMBER_CONTINUATION = frozenset("0123456789.eE+-")
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _projector(fields: Sequence) -> Callable[[Any], Any]:
+    """Build a function keeping only the key paths in `fields` of a dict.
+    Each field is a key or a sequence of keys; the nesting is preserved,
+    and a path stops early where the value is not a dict (e.g. null).
+    """
+    paths = [(field,) if isinstance(field, str) else tuple(field)
+             for field in fields]
+
+    def project(item: Any) -> Any:
+        """Keep only the projected paths of `item`"""
+        if type(item) is not dict:
+            return item
+        projected: Dict = {}
+        for path in paths:
+            source, target = item, projected
+            for depth, key in enumerate(path, 1):
+                if type(source) is not dict or key not in source:
+                    break
+                source = source[key]
+                if depth == len(path) or type(source) is not dict:
+                    target[key] = source
+                    break
+                target = target.setdefault(key, {})
+        return projected
+
+    return project
+
+
+def iter_json_array(
+    chunks: Iterable[bytes], fields: Sequence = None
+) -> Iterator[Any]:
+    """Parse a JSON array from byte chunks, yielding one item at a time.
+    Only the item being parsed is buffered, so memory stays flat however
+    long the array is. With `fields`, each item is reduced to those key
+    paths as soon as it is parsed.
+    Example
+    -------
+    >>> chunks = [b'[{"name": "a", "li', b'cense": {"key": "mit"}}]']
+    >>> list(iter_json_array(chunks, fields=[("license", "key")]))
+    [{'license': {'key': 'mit'}}]
+    """
+    project = _projector(fields) if fields is not None else None
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos, state, eof = "", 0, "start", False
+    chunks = iter(chunks)
+
+    while not eof:
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buffer += text.decode(b"", final=True)
+        else:
+            buffer += text.decode(chunk)
+
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos >= len(buffer):
+                break
+            if state == "start":
+                if buffer[pos] != "[":
+                    raise ValueError("expected a JSON array")
+                pos += 1
+                state = "first"
+            elif state == "first" and buffer[pos] == "]":
+                pos += 1
+                state = "end"
+            elif state in ("first", "item"):
+                try:
+                    item, end = _DECODER.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    break
+                if not eof and isinstance(item, (int, float)) and (
+                        end >= len(buffer) or
+                        buffer[end] in _NUMBER_CONTINUATION):
+                    # A number is only complete once a delimiter follows:
+                    # "1." or "1e" may continue in the next chunk
+                    break
+                yield project(item) if project is not None else item
+                pos = end
+                state = "separator"
+            elif state == "separator":
+                if buffer[pos] not in ",]":
+                    raise ValueError(
+                        "expected ',' or ']' at offset {}".format(pos))
+                state = "item" if buffer[pos] == "," else "end"
+                pos += 1
+            else:
+                raise ValueError("extra data after the JSON array")
+        buffer, pos = buffer[pos:], 0
+
+    if state != "end":
+        raise ValueError("truncated JSON array")
+
+
+def get_json(
+    url: str, session: "JsonSession" = None, fields: Sequence = None
+) -> Dict:
     """Get JSON from remote URL.
+    When a `JsonSession` is given, the request goes through its pooled,
+    conditional-request aware connection instead of a one-off `requests.get`.
+    With `fields`, the response must be a JSON array: it is parsed as it
+    streams in and each item is reduced to those key paths.
     """
+    if fields is not None:
+        if session is not None:
+            return session.fetch_items(url, fields)[0]
+        with requests.get(url, stream=True) as response:
+            response.raise_for_status()
+            return list(iter_json_array(
+                response.iter_content(JsonSession.CHUNK_SIZE), fields))
+    if session is not None:
+        return session.get_json(url)
     response = requests.get(url)
     return response.json()
 
 
+class JsonSession:
+    """Keep-alive HTTP session for fetching JSON.
+    Connections are pooled and reused across calls, every request has a
+    timeout, and responses carrying an `ETag` or `Last-Modified` header are
+    revalidated with conditional requests, so unchanged resources come back
+    as bodiless 304s and are served from memory. With a `ResponseCache`
+    the responses are kept on disk instead, so they outlive the process and
+    fresh entries are served without any request at all. With a
+    `RateLimiter` every request is scheduled under the API rate limit and
+    rate limited responses are retried once the server allows it.
+    Example
+    -------
+    >>> with JsonSession(pool_size=4, timeout=5) as session:
+    ...     org = get_json("https://api.github.com/orgs/google", session)
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        timeout: Union[float, Tuple[float, float]] = (3.05, 30),
+        session: requests.Session = None,
+        cache: ResponseCache = None,
+        rate_limiter: RateLimiter = None,
+    ) -> None:
+        """Init method of JsonSession.
+        Parameters
+        ----------
+        pool_size: int
+            maximum number of kept-alive connections per host
+        timeout: float or (connect, read) tuple
+            timeout in seconds passed to every request
+        session: requests.Session
+            an existing session to wrap, a new one is created by default
+        cache: ResponseCache
+            persistent response cache, responses are validated in memory
+            only by default
+        rate_limiter: RateLimiter
+            scheduler shared with other sessions, e.g.
+            `RateLimiter.shared()`; requests are not throttled by default
+        """
+        self.timeout = timeout
+        self._session = session if session is not None else requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._cache = cache
+        self._rate_limiter = rate_limiter
+        self._validated: Dict[str, Tuple[Dict[str, str], Any]] = {}
+        self._revalidating: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "JsonSession":
+        """Enter the context manager"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Close the pooled connections on exit"""
+        self.close()
+
+    def close(self) -> None:
+        """Close the pooled connections"""
+        self._session.close()
+
+    def fetch(self, url: str) -> Tuple[Any, Mapping[str, str]]:
+        """Get JSON and the response headers from `url`.
+        A 304 answer to a conditional request returns the payload stored
+        for `url` together with the fresh headers of the 304.
+        """
+        if self._cache is not None:
+            entry = self._cache.get(url)
+            if entry is not None and self._cache.is_fresh(entry):
+                return entry.payload, CaseInsensitiveDict(entry.headers)
+            if entry is not None and self._cache.is_usable_stale(entry):
+                self._revalidate_in_background(url)
+                return entry.payload, CaseInsensitiveDict(entry.headers)
+            validators = entry.validators if entry is not None else {}
+            cached = entry.payload if entry is not None else None
+        else:
+            with self._lock:
+                validators, cached = self._validated.get(url, ({}, None))
+
+        response = self._get(url, validators)
+        if response.status_code == 304 and validators:
+            if self._cache is not None:
+                self._cache.refresh(url, response.headers)
+            return cached, response.headers
+        response.raise_for_status()
+
+        payload = response.json()
+        if self._cache is not None:
+            self._cache.set(url, payload, response.headers)
+            return payload, response.headers
+
+        validators = {}
+        if "ETag" in response.headers:
+            validators["If-None-Match"] = response.headers["ETag"]
+        if "Last-Modified" in response.headers:
+            validators["If-Modified-Since"] = response.headers["Last-Modified"]
+        if validators:
+            with self._lock:
+                self._validated[url] = (validators, payload)
+        return payload, response.headers
+
+    def fetch_items(
+        self, url: str, fields: Sequence = None
+    ) -> Tuple[List, Mapping[str, str]]:
+        """Stream the JSON array at `url`, keeping only `fields` of each item.
+        Returns the items and the response headers. Streamed responses
+        bypass the conditional request and `ResponseCache` machinery, which
+        store whole payloads.
+        """
+        response = self._get(url, {}, stream=True)
+        with response:
+            response.raise_for_status()
+            items = list(iter_json_array(
+                response.iter_content(self.CHUNK_SIZE), fields))
+        return items, response.headers
+
+    def _get(
+        self, url: str, headers: Dict[str, str], stream: bool = False
+    ) -> requests.Response:
+        """GET `url`, waiting for the rate limiter and retrying when the
+        response says the rate limit was hit.
+        """
+        limiter = self._rate_limiter
+        if limiter is None:
+            return self._session.get(url, headers=headers, stream=stream,
+                                     timeout=self.timeout)
+        for attempt in range(limiter.max_retries + 1):
+            limiter.acquire()
+            response = self._session.get(url, headers=headers, stream=stream,
+                                         timeout=self.timeout)
+            delay = limiter.update(response.status_code, response.headers)
+            if delay is None or attempt == limiter.max_retries:
+                break
+            # Give the connection back to the pool before retrying
+            response.close()
+        return response
+
+    def _revalidate_in_background(self, url: str) -> None:
+        """Refresh the cached entry for `url` on a background thread"""
+        with self._lock:
+            if url in self._revalidating:
+                return
+            self._revalidating.add(url)
+
+        def revalidate() -> None:
+            """Fetch `url` past the stale cache entry"""
+            try:
+                entry = self._cache.get(url)
+                response = self._get(
+                    url, entry.validators if entry else {})
+                if response.status_code == 304:
+                    self._cache.refresh(url, response.headers)
+                elif response.ok:
+                    self._cache.set(url, response.json(), response.headers)
+            except (requests.RequestException, ValueError):
+                pass
+            finally:
+                with self._lock:
+                    self._revalidating.discard(url)
+
+        threading.Thread(target=revalidate, daemon=True).start()
+
+    def get_json(self, url: str) -> Any:
+        """Get JSON from remote URL through the pooled session"""
+        return self.fetch(url)[0]
+
+
+def _with_query(url: str, **params: Any) -> str:
+    """Return `url` with `params` set in its query string"""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.update({key: str(value) for key, value in params.items()})
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _page_links(headers: Mapping[str, str]) -> Dict[str, str]:
+    """Map the `rel` of each entry of a `Link` header to its URL"""
+    return {
+        link["rel"]: link["url"]
+        for link in parse_header_links(headers.get("Link", ""))
+        if "rel" in link
+    }
+
+
+def get_json_pages(
+    url: str,
+    session: JsonSession,
+    per_page: int = 100,
+    max_workers: int = 4,
+    fields: Sequence = None,
+) -> List:
+    """Get every page of a paginated JSON list and concatenate them.
+    Pages are linked with `Link: <...>; rel="next"` headers. When the first
+    page also advertises `rel="last"`, the remaining page numbers are known
+    and fetched concurrently on at most `max_workers` threads; otherwise
+    the `next` links are followed one by one. With `fields`, every page
+    is streamed and its items reduced to those key paths.
+    Example
+    -------
+    >>> with JsonSession() as session:
+    ...     repos = get_json_pages(
+    ...         "https://api.github.com/orgs/google/repos", session)
+    """
+    if fields is None:
+        fetch = session.fetch
+    else:
+        def fetch(page_url: str) -> Tuple[List, Mapping[str, str]]:
+            """Stream one page keeping only `fields`"""
+            return session.fetch_items(page_url, fields)
+
+    items, headers = fetch(_with_query(url, per_page=per_page))
+    items = list(items)
+    links = _page_links(headers)
+
+    if "next" in links and "last" in links:
+        last_query = dict(parse_qsl(urlsplit(links["last"]).query))
+        last_page = int(last_query.get("page", 1))
+        page_urls = [_with_query(links["next"], page=page)
+                     for page in range(2, last_page + 1)]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for page, _ in executor.map(fetch, page_urls):
+                items.extend(page)
+        return items
+
+    while "next" in links:
+        page, headers = fetch(links["next"])
+        items.extend(page)
+        links = _page_links(headers)
+    return items
+
+
 def memoize(fn: Callable) -> Callable:
     """Decorator to memoize a method.
     Example
@@ -73,3 +505,113 @@ def memoize(fn: Callable) -> Callable:
         return getattr(self, attr_name)
 
     return property(memoized)
+
+
+class _MemoEntry:
+    """Lock and `(value, expires_at)` state of one memoized attribute"""
+    __slots__ = ("lock", "state")
+
+    def __init__(self) -> None:
+        """Init method of _MemoEntry"""
+        self.lock = threading.Lock()
+        self.state: Optional[Tuple[Any, Optional[float]]] = None
+
+
+class MemoizedProperty:
+    """Thread-safe, invalidatable memoized property.
+    See `memoize_locked`.
+    """
+    _entry_lock = threading.Lock()
+
+    def __init__(self, fn: Callable, ttl: float = None) -> None:
+        """Init method of MemoizedProperty"""
+        self.fn = fn
+        self.ttl = ttl
+        self.attr_name = "_{}".format(fn.__name__)
+        self.__doc__ = fn.__doc__
+        self.__name__ = fn.__name__
+
+    def _entry(self, instance: Any) -> _MemoEntry:
+        """The memo entry of `instance`, created on first access"""
+        entry = getattr(instance, self.attr_name, None)
+        if type(entry) is not _MemoEntry:
+            with self._entry_lock:
+                entry = getattr(instance, self.attr_name, None)
+                if type(entry) is not _MemoEntry:
+                    entry = _MemoEntry()
+                    setattr(instance, self.attr_name, entry)
+        return entry
+
+    def __get__(self, instance: Any, owner: type = None) -> Any:
+        """Memoized value, computed once even under concurrent access"""
+        if instance is None:
+            return self
+        entry = self._entry(instance)
+        state = entry.state
+        if state is not None and (state[1] is None or
+                                  time.monotonic() < state[1]):
+            return state[0]
+        with entry.lock:
+            # Another thread may have filled the entry while we waited
+            state = entry.state
+            if state is not None and (state[1] is None or
+                                      time.monotonic() < state[1]):
+                return state[0]
+            value = self.fn(instance)
+            expires = None
+            if self.ttl is not None:
+                expires = time.monotonic() + self.ttl
+            entry.state = (value, expires)
+        return value
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        """Memoized properties are read-only, like `property`"""
+        raise AttributeError("can't set attribute")
+
+    def is_memoized(self, instance: Any) -> bool:
+        """Whether `instance` holds an unexpired memoized value"""
+        entry = getattr(instance, self.attr_name, None)
+        if type(entry) is not _MemoEntry:
+            return False
+        state = entry.state
+        return state is not None and (state[1] is None or
+                                      time.monotonic() < state[1])
+
+    def invalidate(self, instance: Any) -> None:
+        """Drop the memoized value so the next access recomputes it"""
+        entry = getattr(instance, self.attr_name, None)
+        if type(entry) is _MemoEntry:
+            entry.state = None
+
+
+def memoize_locked(
+    fn: Callable = None, ttl: float = None
+) -> Union[MemoizedProperty, Callable[[Callable], MemoizedProperty]]:
+    """Decorator to memoize a method, safely under threads.
+    Like `memoize`, but concurrent first accesses compute the value once,
+    the value expires after `ttl` seconds when given, and it can be
+    dropped with `invalidate`. State is kept in `_<name>`, so classes with
+    `__slots__` only need to declare that slot.
+    Example
+    -------
+    class MyClass:
+        __slots__ = ("_a_method",)
+
+        @memoize_locked(ttl=60)
+        def a_method(self):
+            print("a_method called")
+            return 42
+    >>> my_object = MyClass()
+    >>> my_object.a_method
+    a_method called
+    42
+    >>> my_object.a_method
+    42
+    >>> MyClass.a_method.invalidate(my_object)
+    >>> my_object.a_method
+    a_method called
+    42
+    """
+    if fn is None:
+        return lambda fn: MemoizedProperty(fn, ttl)
+    return MemoizedProperty(fn, ttl)
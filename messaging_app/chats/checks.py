@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The membership cache (chats.membership) must be shared across processes
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend.endswith('LocMemCache'):
+        return [Warning(
+            "The default cache is process-local, so participant changes are only "
+            "seen by the worker that made them until the membership cache expires.",
+            hint="Set REDIS_URL (or configure a shared CACHES backend) when running several workers.",
+            id='chats.W001',
+        )]
+    return []
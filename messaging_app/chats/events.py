@@ -0,0 +1,153 @@
+import asyncio
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .membership import is_participant
+from .models import Message
+from .pubsub import conversation_channel, get_broker
+from .renderers import FastJSONRenderer
+from .serializers import MESSAGE_VALUES, USER_VALUES, UserRepresentations, serialize_messages, user_representation
+
+# Client reconnect delay, keep-alive interval and lifetime of one stream; the
+# browser's EventSource reconnects with Last-Event-ID and catches up
+RETRY_MS = 3000
+KEEPALIVE_SECONDS = 15
+STREAM_SECONDS = 300
+MAX_CATCH_UP = 500
+
+render = FastJSONRenderer().render
+
+
+def publish_messages(messages):
+    """
+    Push new messages to the subscribers of their conversations once the
+    current transaction commits, in the same shape as the messages API
+    """
+    users = UserRepresentations()
+    for message in messages:
+        if Message.sender.is_cached(message):
+            users[message.sender_id] = user_representation(
+                {field: getattr(message.sender, field) for field in USER_VALUES}
+            )
+    rows = [{field: getattr(message, field) for field in MESSAGE_VALUES} for message in messages]
+
+    def publish():
+        broker = get_broker()
+        for data in serialize_messages(rows, users):
+            broker.publish(conversation_channel(data['conversation']), data)
+
+    transaction.on_commit(publish)
+
+
+def format_event(data):
+    return f"id: {data['message_id']}\nevent: message\ndata: {render(data).decode()}\n\n"
+
+
+def missed_messages(conversation_id, last_event_id):
+    """
+    Messages sent after the one a reconnecting client saw last, or None
+    when that message is not in the conversation (anymore)
+    """
+    last = Message.objects.filter(conversation=conversation_id, pk=last_event_id).values('sent_at', 'message_id').first()
+    if last is None:
+        return None
+    rows = (
+        Message.objects.filter(conversation=conversation_id)
+        .filter(Q(sent_at__gt=last['sent_at']) | Q(sent_at=last['sent_at'], message_id__gt=last['message_id']))
+        .order_by('sent_at', 'message_id')
+        .values(*MESSAGE_VALUES)[:MAX_CATCH_UP]
+    )
+    return serialize_messages(list(rows))
+
+
+async def event_stream(conversation_id, last_event_id=None):
+    """
+    Server-sent events for a conversation: one `message` event per new
+    message, and a comment line every KEEPALIVE_SECONDS
+    """
+    loop = asyncio.get_running_loop()
+    async with get_broker().subscribe(conversation_channel(conversation_id)) as queue:
+        yield f"retry: {RETRY_MS}\n\n"
+        seen = set()
+        if last_event_id:
+            # Subscribed first, so nothing sent meanwhile falls in between
+            for data in await sync_to_async(missed_messages)(conversation_id, last_event_id) or ():
+                seen.add(data['message_id'])
+                yield format_event(data)
+
+        deadline = loop.time() + STREAM_SECONDS
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                data = await asyncio.wait_for(queue.get(), min(KEEPALIVE_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if data['message_id'] not in seen:
+                yield format_event(data)
+
+
+def poll_stream(conversation_id, last_event_id=None):
+    """
+    Server-sent events for WSGI servers, where a long-lived stream would
+    hold a worker: the messages missed since last_event_id, then the stream
+    ends and the client reconnects after RETRY_MS, i.e. polls. Without a
+    (known) last_event_id, only the id of the latest message is sent for
+    the client to resume from.
+    """
+    yield f"retry: {RETRY_MS}\n\n"
+    missed = missed_messages(conversation_id, last_event_id) if last_event_id else None
+    if missed is None:
+        latest = (
+            Message.objects.filter(conversation=conversation_id)
+            .order_by('-sent_at', '-message_id')
+            .values_list('message_id', flat=True)
+            .first()
+        )
+        if latest is not None:
+            # An event without data only sets the client's last event id
+            yield f"id: {latest}\n\n"
+        return
+    for data in missed:
+        yield format_event(data)
+
+
+async def conversation_events(request, pk):
+    """
+    GET /api/conversations/<pk>/events/ - push channel for new messages,
+    as text/event-stream, replacing polling of the messages endpoint.
+    Authenticates with the API's authentication classes. Streams under
+    ASGI, and falls back to poll_stream under WSGI.
+    """
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        user = await sync_to_async(lambda: drf_request.user)()
+    except APIException as exc:
+        return JsonResponse({"detail": str(exc.detail)}, status=exc.status_code)
+    if not user.is_authenticated:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    if not await sync_to_async(is_participant)(drf_request, pk):
+        raise Http404
+
+    try:
+        last_event_id = uuid.UUID(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        # Not one of our message ids, resume as a new client
+        last_event_id = None
+    if isinstance(request, ASGIRequest):
+        stream = event_stream(pk, last_event_id)
+    else:
+        # WSGI servers drain async iterators before sending anything
+        stream = poll_stream(pk, last_event_id)
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep proxies such as nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,124 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from .serializers import format_datetime
+
+# Columns of an exported message, in order
+EXPORT_FIELDS = ['message_id', 'sender', 'sender_username', 'message_body', 'sent_at', 'created_at']
+EXPORT_COLUMNS = ['message_id', 'sender_id', 'sender__username', 'message_body', 'sent_at', 'created_at']
+
+
+def export_values(messages):
+    return messages.order_by('sent_at', 'message_id').values_list(*EXPORT_COLUMNS)
+
+
+def export_row(message_id, sender_id, username, body, sent_at, created_at):
+    return str(message_id), str(sender_id), username, body, format_datetime(sent_at), format_datetime(created_at)
+
+
+def export_rows(messages, chunk_size=2000):
+    """
+    Yield plain value tuples of the messages queryset, fetched chunk by chunk
+    from a values_list() projection so no model instances are built
+    """
+    for values in export_values(messages).iterator(chunk_size=chunk_size):
+        yield export_row(*values)
+
+
+async def aexport_chunks(messages, chunk_size=2000):
+    """
+    export_rows() for ASGI, in lists of chunk_size rows fetched off the
+    event loop (Django 4.2's aiterator() runs values_list() queries on it)
+    """
+    values = export_values(messages).iterator(chunk_size=chunk_size)
+    fetch = sync_to_async(lambda: [export_row(*row) for row in islice(values, chunk_size)])
+    while chunk := await fetch():
+        yield chunk
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def ndjson_lines(rows):
+    return ''.join(_dumps(dict(zip(EXPORT_FIELDS, row))) + '\n' for row in rows)
+
+
+def stream_ndjson(messages, chunk_size=2000):
+    """
+    Yield the messages as NDJSON, one string per chunk of rows
+    """
+    for chunk in chunked(export_rows(messages, chunk_size), chunk_size):
+        yield ndjson_lines(chunk)
+
+
+async def astream_ndjson(messages, chunk_size=2000):
+    """
+    stream_ndjson() as an async iterator, for ASGI servers
+    """
+    async for chunk in aexport_chunks(messages, chunk_size):
+        yield ndjson_lines(chunk)
+
+
+class ChunkBuffer:
+    """
+    File-like object collecting csv.writer output until it is drained
+    """
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, value):
+        self.parts.append(value)
+
+    def drain(self):
+        data = ''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def csv_writer():
+    """
+    A csv.writer over a ChunkBuffer, with the header row written
+    """
+    buffer = ChunkBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    return buffer, writer
+
+
+def stream_csv(messages, chunk_size=2000):
+    """
+    Yield the messages as CSV with a header row, one string per chunk of rows
+    """
+    buffer, writer = csv_writer()
+    for chunk in chunked(export_rows(messages, chunk_size), chunk_size):
+        writer.writerows(chunk)
+        yield buffer.drain()
+    if buffer.parts:
+        yield buffer.drain()
+
+
+async def astream_csv(messages, chunk_size=2000):
+    """
+    stream_csv() as an async iterator, for ASGI servers
+    """
+    buffer, writer = csv_writer()
+    async for chunk in aexport_chunks(messages, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.drain()
+    if buffer.parts:
+        yield buffer.drain()
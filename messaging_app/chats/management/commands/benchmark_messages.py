@@ -0,0 +1,215 @@
+import json
+import time
+import tracemalloc
+
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from chats.models import User, Conversation, Message
+from chats.pagination import MessageCursorPagination, MessagePagination
+from chats.renderers import FastJSONRenderer
+from chats.serializers import MESSAGE_VALUES, MessageSerializer, serialize_messages
+from chats.views import ConversationViewSet, MessageViewSet
+
+
+def best_of(repeat, fn):
+    """
+    Return the fastest of `repeat` timed calls of fn, in milliseconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the messages endpoints on a seeded conversation. "
+        "Everything runs in a transaction that is rolled back."
+    )
+
+    benchmarks = ['pagination', 'explain', 'ingest', 'export', 'serializers', 'renderers']
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Benchmarks to run (default: all of {self.benchmarks})")
+        parser.add_argument('--messages', type=int, default=100_000, help="Messages to seed")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per measurement")
+
+    def handle(self, *args, names=(), messages=100_000, repeat=5, **options):
+        self.repeat = repeat
+        self.factory = APIRequestFactory(SERVER_NAME='localhost')
+        with transaction.atomic():
+            self.conversation = self.seed(messages)
+            for name in names or self.benchmarks:
+                self.stdout.write(f"== {name} ==")
+                getattr(self, f'bench_{name}')()
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        sender = User.objects.create_user(username='benchmark', email='benchmark@example.com', password='benchmark')
+        conversation = Conversation.objects.create()
+        conversation.participants.add(sender)
+        Message.objects.bulk_create(
+            (Message(conversation=conversation, sender=sender, message_body=f"message {i}") for i in range(count)),
+            batch_size=5000,
+        )
+        self.stdout.write(f"Seeded {count} messages")
+        return conversation
+
+    def request(self, **params):
+        return Request(self.factory.get('/api/messages/', params))
+
+    def bench_pagination(self):
+        """
+        Page 1 vs a deep page, page numbers (COUNT + OFFSET) vs cursor
+        """
+        queryset = Message.objects.filter(conversation=self.conversation)
+        total = queryset.count()
+        page_size = MessagePagination.page_size
+        deep = max(1, total // page_size)
+
+        def numbered(page):
+            ordered = queryset.order_by('-sent_at', '-message_id')
+            return lambda: MessagePagination().paginate_queryset(ordered, self.request(page=page))
+
+        def cursor(page):
+            params = {}
+            if page > 1:
+                # Position of the last message on the page before, as a client would hold it
+                last = queryset.order_by('-sent_at', '-message_id')[(page - 1) * page_size - 1]
+                params['cursor'] = MessageCursorPagination().encode_position(last)
+            return lambda: MessageCursorPagination().paginate_queryset(queryset, self.request(**params))
+
+        for label, paginate in [('page number', numbered), ('cursor', cursor)]:
+            first = best_of(self.repeat, paginate(1))
+            last = best_of(self.repeat, paginate(deep))
+            self.stdout.write(f"{label:>12}: page 1 {first:.2f}ms, page {deep} {last:.2f}ms")
+
+    def bench_explain(self):
+        """
+        Query plans of the hot chats queries, which should all use an index
+        """
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        sender = self.conversation.participants.get()
+        since = Message.objects.filter(conversation=self.conversation).order_by('-created_at')[1000].created_at
+        queries = {
+            'conversation history': Message.objects.filter(conversation=self.conversation)
+            .order_by('-sent_at', '-message_id')[:20],
+            'conversation created_at range': Message.objects.filter(
+                conversation=self.conversation, created_at__gte=since).order_by('created_at'),
+            'sender created_at range': Message.objects.filter(
+                sender=sender, created_at__gte=since).order_by('created_at'),
+            'conversations of user': Conversation.objects.filter(participants=sender),
+            'inbox of user': Conversation.objects.filter(read_states__user=sender)
+            .order_by('-read_states__last_activity_at', '-read_states__conversation')[:20],
+        }
+        for label, queryset in queries.items():
+            self.stdout.write(f"{label}:")
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f"    {line}")
+
+    def bench_ingest(self):
+        """
+        Messages per second through the bulk action, JSON array and NDJSON
+        """
+        count = 20_000
+        sender = self.conversation.participants.get()
+        url = f'/api/conversations/{self.conversation.pk}/messages/bulk/'
+        view = MessageViewSet.as_view({'post': 'bulk'}, **MessageViewSet.bulk.kwargs)
+        items = [{'message_body': f"imported {i}"} for i in range(count)]
+        ndjson = '\n'.join(json.dumps(item) for item in items)
+
+        requests = {
+            'json': lambda: self.factory.post(url, items, format='json'),
+            'ndjson': lambda: self.factory.post(url, ndjson, content_type='application/x-ndjson'),
+        }
+        single = MessageViewSet.as_view({'post': 'create'})
+        start = time.perf_counter()
+        for item in items[:500]:
+            request = self.factory.post(f'/api/conversations/{self.conversation.pk}/messages/', item, format='json')
+            force_authenticate(request, user=sender)
+            single(request, conversation_pk=str(self.conversation.pk))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{'single':>8}: 500 messages in {elapsed * 1000:.0f}ms, {500 / elapsed:,.0f} messages/s")
+
+        for label, build in requests.items():
+            request = build()
+            force_authenticate(request, user=sender)
+            start = time.perf_counter()
+            response = view(request, conversation_pk=str(self.conversation.pk))
+            elapsed = time.perf_counter() - start
+            assert response.status_code == 201, response.data
+            self.stdout.write(f"{label:>8}: {count} messages in {elapsed * 1000:.0f}ms, {count / elapsed:,.0f} messages/s")
+
+    def bench_export(self):
+        """
+        Full-history export, streamed NDJSON/CSV vs serializing every message
+        """
+        sender = self.conversation.participants.get()
+        view = ConversationViewSet.as_view({'get': 'export'}, **ConversationViewSet.export.kwargs)
+        messages = Message.objects.filter(conversation=self.conversation)
+        total = messages.count()
+
+        def serialized():
+            return json.dumps(MessageSerializer(messages.select_related('sender'), many=True).data, default=str)
+
+        def streamed(output):
+            def run():
+                request = self.factory.get(f'/api/conversations/{self.conversation.pk}/export/', {'output': output})
+                force_authenticate(request, user=sender)
+                response = view(request, pk=str(self.conversation.pk))
+                for _ in response.streaming_content:
+                    pass
+            return run
+
+        for label, run in [('serializer', serialized), ('ndjson', streamed('ndjson')), ('csv', streamed('csv'))]:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            # Memory in a second run, tracemalloc slows everything down
+            tracemalloc.start()
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.stdout.write(f"{label:>10}: {total / elapsed:,.0f} rows/s, peak memory {peak / 2 ** 20:.1f} MiB")
+
+    def bench_serializers(self):
+        """
+        One page of 100 messages, MessageSerializer vs the .values() fast path
+        """
+        # A few senders, so the per-page user cache is exercised as in real pages
+        senders = [
+            User.objects.create_user(username=f'sender{i}', email=f'sender{i}@example.com', password='benchmark')
+            for i in range(5)
+        ]
+        page = Message.objects.filter(conversation=self.conversation).order_by('-sent_at', '-message_id')[:100]
+        Message.objects.filter(pk__in=[m.pk for m in page[:50]]).update(sender=senders[0])
+
+        instances = list(page.select_related('sender'))
+        rows = list(page.values(*MESSAGE_VALUES))
+        timings = {
+            'serializer': best_of(self.repeat, lambda: MessageSerializer(instances, many=True).data),
+            'fast path': best_of(self.repeat, lambda: serialize_messages(rows)),
+            'serializer + query': best_of(
+                self.repeat, lambda: MessageSerializer(list(page.select_related('sender')), many=True).data),
+            'fast path + query': best_of(self.repeat, lambda: serialize_messages(list(page.values(*MESSAGE_VALUES)))),
+        }
+        for label, elapsed in timings.items():
+            self.stdout.write(f"{label:>18}: {elapsed:.2f}ms per 100 rows")
+
+    def bench_renderers(self):
+        """
+        Rendering 1000 messages, DRF's JSONRenderer vs FastJSONRenderer
+        """
+        page = Message.objects.filter(conversation=self.conversation).select_related('sender')[:1000]
+        data = MessageSerializer(page, many=True).data
+        for label, renderer in [('JSONRenderer', JSONRenderer()), ('FastJSONRenderer', FastJSONRenderer())]:
+            elapsed = best_of(self.repeat, lambda: renderer.render(data))
+            self.stdout.write(f"{label:>16}: {elapsed:.2f}ms per 1000 messages")
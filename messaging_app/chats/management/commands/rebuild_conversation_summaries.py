@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from chats.summary import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the denormalized conversation summaries (last message, "
+        "message count) and participants' read states from the messages."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('conversations', nargs='*', help="Conversation ids (default: all)")
+
+    def handle(self, *args, conversations=(), **options):
+        with transaction.atomic():
+            rebuilt = rebuild_summaries(conversations or None)
+        self.stdout.write(f"Rebuilt {rebuilt} conversation summaries")
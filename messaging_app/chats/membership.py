@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Conversation
+
+# Seconds a user's conversation set stays cached; signals invalidate it on change
+MEMBERSHIP_CACHE_TIMEOUT = 300
+
+
+def membership_cache_key(user_pk):
+    return f"chats:conversations:{user_pk}"
+
+
+def conversation_ids(request):
+    """
+    Return the set of conversation ids the request user participates in.
+
+    Memoized on the request, so permission checks on every object of a page
+    share one lookup, and cached across requests until the participants of
+    one of the user's conversations change.
+    """
+    ids = getattr(request, '_conversation_ids', None)
+    if ids is None:
+        key = membership_cache_key(request.user.pk)
+        ids = cache.get(key)
+        if ids is None:
+            ids = frozenset(
+                Conversation.objects.filter(participants=request.user).values_list('pk', flat=True)
+            )
+            cache.set(key, ids, MEMBERSHIP_CACHE_TIMEOUT)
+        request._conversation_ids = ids
+    return ids
+
+
+def to_conversation_id(value):
+    """
+    Return value as a conversation primary key, or None if it is not one
+    """
+    try:
+        return Conversation._meta.pk.to_python(value)
+    except ValidationError:
+        return None
+
+
+def is_participant(request, conversation_id):
+    """
+    Check whether the request user participates in the conversation
+    """
+    return to_conversation_id(conversation_id) in conversation_ids(request)
+
+
+def invalidate_membership(user_pks):
+    """
+    Drop the cached conversation sets of the given users
+    """
+    cache.delete_many([membership_cache_key(pk) for pk in user_pks])
+
+
+def invalidate_membership_on_commit(user_pks):
+    """
+    Drop the cached conversation sets of the given users once the current
+    transaction commits, so no concurrent request can cache the old
+    participants again in between
+    """
+    user_pks = list(user_pks)
+    transaction.on_commit(lambda: invalidate_membership(user_pks))
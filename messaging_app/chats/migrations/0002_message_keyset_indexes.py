@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'sent_at', 'message_id'], name='message_conv_sent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sent_at', 'message_id'], name='message_sent_idx'),
+        ),
+    ]
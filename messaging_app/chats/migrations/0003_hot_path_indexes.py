@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:02
+
+from django.db import migrations, models
+
+
+# The participants through table is auto-created, so its index cannot be
+# declared on a model; it is added with the schema editor instead.
+PARTICIPANTS_USER_INDEX = models.Index(fields=['user', 'conversation'], name='participants_user_conv_idx')
+
+
+def add_participants_index(apps, schema_editor):
+    through = apps.get_model('chats', 'Conversation').participants.through
+    schema_editor.add_index(through, PARTICIPANTS_USER_INDEX)
+
+
+def remove_participants_index(apps, schema_editor):
+    through = apps.get_model('chats', 'Conversation').participants.through
+    schema_editor.remove_index(through, PARTICIPANTS_USER_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0002_message_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created_at'], name='message_conv_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender', 'created_at'], name='message_sender_created_idx'),
+        ),
+        # Conversations of a user (participants=user) read from this index alone
+        migrations.RunPython(add_participants_index, remove_participants_index),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def backfill_summaries(apps, schema_editor):
+    # A frozen copy of chats.summary.rebuild_summaries at the time of this
+    # migration: summaries from the messages, one read state per participant
+    # with the history read
+    Conversation = apps.get_model('chats', 'Conversation')
+    Message = apps.get_model('chats', 'Message')
+    ReadState = apps.get_model('chats', 'ReadState')
+    Participant = Conversation.participants.through
+
+    messages = Message.objects.filter(conversation=OuterRef('pk'))
+    count = messages.order_by().values('conversation').annotate(n=Count('pk')).values('n')
+    latest = messages.order_by('-sent_at', '-message_id')
+    Conversation.objects.update(
+        message_count=Coalesce(Subquery(count), 0),
+        last_message=Subquery(latest.values('pk')[:1]),
+        last_message_at=Subquery(latest.values('sent_at')[:1]),
+    )
+
+    ReadState.objects.bulk_create(
+        (
+            ReadState(user_id=user, conversation_id=conversation, last_activity_at=last_message_at or created_at,
+                      last_read_at=last_message_at)
+            for user, conversation, last_message_at, created_at in Participant.objects.values_list(
+                'user', 'conversation', 'conversation__last_message_at', 'conversation__created_at')
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='chats.message'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_activity_at', models.DateTimeField()),
+                ('last_read_at', models.DateTimeField(blank=True, null=True)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_states', to='chats.conversation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-last_activity_at', '-conversation'], name='read_state_inbox_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='readstate',
+            constraint=models.UniqueConstraint(fields=('user', 'conversation'), name='read_state_user_conv_unique'),
+        ),
+        # Summaries and read states of the existing conversations
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -22,10 +22,39 @@ class Conversation(models.Model):
     conversation_id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
     participants = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='conversations')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalized summary, kept up to date by chats.summary; no constraint on
+    # last_message so deleting messages never has to update conversations
+    last_message = models.ForeignKey(
+        'Message', null=True, blank=True, editable=False, on_delete=models.DO_NOTHING,
+        db_constraint=False, related_name='+',
+    )
+    last_message_at = models.DateTimeField(null=True, blank=True, editable=False)
+    message_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"Conversation {self.conversation_id}"
 
+# ✅ Per-participant read state, one row per (user, conversation)
+class ReadState(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='read_states')
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='read_states')
+    # Last message time, or creation time for an empty conversation: the inbox order
+    last_activity_at = models.DateTimeField()
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'conversation'], name='read_state_user_conv_unique'),
+        ]
+        indexes = [
+            # Inbox: a user's conversations, most recent first, in one range scan
+            models.Index(fields=['user', '-last_activity_at', '-conversation'], name='read_state_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.conversation_id}: {self.unread_count} unread"
+
 # ✅ Message Model
 class Message(models.Model):
     message_id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
@@ -35,5 +64,15 @@ class Message(models.Model):
     sent_at = models.DateTimeField(auto_now_add=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination (MessageCursorPagination), per conversation and overall
+            models.Index(fields=['conversation', 'sent_at', 'message_id'], name='message_conv_sent_idx'),
+            models.Index(fields=['sent_at', 'message_id'], name='message_sent_idx'),
+            # MessageFilter: created_at ranges within a conversation or from a sender
+            models.Index(fields=['conversation', 'created_at'], name='message_conv_created_idx'),
+            models.Index(fields=['sender', 'created_at'], name='message_sender_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.sender.username}: {self.message_body[:30]}"
@@ -1,7 +1,15 @@
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.response import Response
+import json
+import uuid
+from base64 import b64decode, b64encode
 from collections import OrderedDict
 
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
 
 class MessagePagination(PageNumberPagination):
     """
@@ -26,6 +34,118 @@ class MessagePagination(PageNumberPagination):
         ]))
 
 
+class MessageCursorPagination(BasePagination):
+    """
+    Keyset pagination for messages, newest first, on (sent_at, message_id).
+    Each page is one indexed range scan from the opaque cursor, with no
+    COUNT(*) and no OFFSET, so deep pages cost the same as the first and
+    new messages never shift page boundaries.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        """
+        Return (sent_at, message_id, reverse) from the request cursor, or None
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            position = json.loads(b64decode(encoded.encode('ascii'), validate=True))
+            sent_at = parse_datetime(position['s'])
+            if sent_at is None:
+                raise ValueError(position['s'])
+            return sent_at, uuid.UUID(position['m']), bool(position.get('r'))
+        except (AttributeError, TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_position(self, message, reverse=False):
+        """
+        Return the opaque cursor token for the page past `message`, a model
+        instance or a values() row
+        """
+        if isinstance(message, dict):
+            # Rows of a .values() queryset
+            sent_at, message_id = message['sent_at'], message['message_id']
+        else:
+            sent_at, message_id = message.sent_at, message.message_id
+        position = {'s': sent_at.isoformat(), 'm': message_id.hex}
+        if reverse:
+            position['r'] = 1
+        return b64encode(json.dumps(position, separators=(',', ':')).encode('ascii')).decode('ascii')
+
+    def encode_cursor(self, message, reverse):
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_position(message, reverse))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[2]
+
+        if reverse:
+            # Walking back towards newer messages, oldest first
+            queryset = queryset.order_by('sent_at', 'message_id')
+        else:
+            queryset = queryset.order_by('-sent_at', '-message_id')
+        if cursor is not None:
+            sent_at, message_id = cursor[:2]
+            lookup = 'gt' if reverse else 'lt'
+            # The inclusive bound on sent_at alone is what lets the planner
+            # seek into the (sent_at, message_id) index instead of scanning
+            queryset = queryset.filter(
+                Q(**{f'sent_at__{lookup}e': sent_at}),
+                Q(**{f'sent_at__{lookup}': sent_at})
+                | Q(sent_at=sent_at, **{f'message_id__{lookup}': message_id}),
+            )
+
+        # One extra row tells whether there is a page beyond this one
+        page = list(queryset[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+
+        self.page = page
+        self.has_next = cursor is not None if reverse else has_more
+        self.has_previous = has_more if reverse else cursor is not None
+        return page
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        """
+        Return a cursor style response, without count or page numbers
+        """
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('page_size', self.page_size),
+            ('results', data)
+        ]))
+
+
 class ConversationPagination(PageNumberPagination):
     """
     Custom pagination class for conversations
@@ -1,4 +1,6 @@
 from rest_framework import permissions
+from rest_framework.permissions import BasePermission
+from .membership import is_participant
 from .models import Conversation
 
 
@@ -19,13 +21,12 @@ class IsParticipantOfConversation(permissions.BasePermission):
         Check if user is a participant in the conversation
         """
         # For Message objects, check if user is participant in the conversation
-        if hasattr(obj, 'conversation'):
-            conversation = obj.conversation
-            return conversation.participants.filter(id=request.user.id).exists()
+        if hasattr(obj, 'conversation_id'):
+            return is_participant(request, obj.conversation_id)
         
         # For Conversation objects, check if user is a participant
         if isinstance(obj, Conversation):
-            return obj.participants.filter(id=request.user.id).exists()
+            return is_participant(request, obj.pk)
         
         return False
 
@@ -48,11 +49,11 @@ class IsMessageOwnerOrParticipant(BasePermission):
         """
         # For viewing messages, check if user is participant in conversation
         if request.method in ['GET', 'HEAD', 'OPTIONS']:
-            return obj.conversation.participants.filter(id=request.user.id).exists()
+            return is_participant(request, obj.conversation_id)
         
         # For editing/deleting messages, check if user is the message sender
         if request.method in ['PUT', 'PATCH', 'DELETE']:
-            return obj.sender == request.user
+            return obj.sender_id == request.user.pk
         
         # For creating messages, check if user is participant in conversation
         if request.method == 'POST':
@@ -78,7 +79,7 @@ class IsConversationParticipant(BasePermission):
         Check if user is a participant in the conversation
         """
         if isinstance(obj, Conversation):
-            return obj.participants.filter(id=request.user.id).exists()
+            return is_participant(request, obj.pk)
         
         return False
 
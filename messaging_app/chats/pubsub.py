@@ -0,0 +1,93 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class InMemoryBroker:
+    """
+    Process-local pub/sub: publishers may be sync code in any thread,
+    subscribers are asyncio queues on the event loop that created them.
+
+    It only reaches subscribers of the same process; a Redis-backed broker
+    with the same publish()/subscribe() interface can be configured through
+    settings.CHATS_PUBSUB_BROKER for multi-process deployments.
+    """
+
+    def __init__(self, queue_size=1000):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        """
+        Deliver event to every current subscriber of channel
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._offer, queue, event)
+        return len(subscribers)
+
+    @staticmethod
+    def _offer(queue, event):
+        # A subscriber that falls behind loses its oldest events, not the newest
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def subscribe(self, channel):
+        """
+        Async context manager yielding an asyncio.Queue that receives the
+        events published to channel
+        """
+        return Subscription(self, channel)
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+class Subscription:
+    # A plain class rather than @asynccontextmanager: streams dropped by a
+    # disconnecting client are finalized by the event loop, and must still
+    # unsubscribe cleanly
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.subscriber = None
+
+    async def __aenter__(self):
+        self.subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.broker.queue_size))
+        with self.broker._lock:
+            self.broker._subscribers[self.channel].add(self.subscriber)
+        return self.subscriber[1]
+
+    async def __aexit__(self, *exc_info):
+        subscribers = self.broker._subscribers
+        with self.broker._lock:
+            subscribers[self.channel].discard(self.subscriber)
+            if not subscribers[self.channel]:
+                del subscribers[self.channel]
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """
+    The process wide broker, settings.CHATS_PUBSUB_BROKER or InMemoryBroker
+    """
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(getattr(settings, 'CHATS_PUBSUB_BROKER', 'chats.pubsub.InMemoryBroker'))()
+        return _broker
+
+
+def conversation_channel(conversation_id):
+    return f"conversation:{conversation_id}"
@@ -0,0 +1,88 @@
+import datetime
+import uuid
+
+from rest_framework.utils import encoders
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib json of JSONRenderer is used without it
+    orjson = None
+
+# Values orjson writes exactly like JSONRenderer, and dict keys it writes the same
+NATIVE_TYPES = frozenset({str, int, bool, type(None), uuid.UUID, datetime.datetime, datetime.date, datetime.time})
+NATIVE_KEY_TYPES = frozenset({str, int, bool, type(None)})
+
+
+def needs_json_encoder(data):
+    """
+    Whether data holds floats or non-string-like dict keys, which orjson
+    renders differently: 1e+16 as 1e16, NaN/Infinity as null (where strict
+    JSON rejects them)
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            return True
+        if isinstance(value, dict):
+            if not NATIVE_KEY_TYPES.issuperset(map(type, value)):
+                return True
+            items = value.values()
+        elif isinstance(value, (list, tuple)):
+            items = value
+        else:
+            continue
+        if not NATIVE_TYPES.issuperset(map(type, items)):
+            stack.extend([item for item in items if type(item) not in NATIVE_TYPES])
+    return False
+
+
+class FallBack(Exception):
+    pass
+
+
+_encoder = encoders.JSONEncoder()
+
+
+def default(obj):
+    # DRF's JSONEncoder for what orjson does not know (Decimal, lazy
+    # strings, ...), unless that produces floats
+    value = _encoder.default(obj)
+    if needs_json_encoder(value):
+        raise FallBack
+    return value
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson when it is installed.
+
+    UUIDs, dates and datetimes are encoded natively; anything else orjson
+    does not know goes through DRF's JSONEncoder, so the bytes match
+    JSONRenderer's compact output. Pretty printed, ASCII-only or
+    orjson-less rendering, and data with floats or integers past 64 bits,
+    fall back to JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+            or needs_json_encoder(data)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # Integers past 64 bits, or FallBack from default()
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same \u2028/\u2029 escaping as JSONRenderer, to stay a javascript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
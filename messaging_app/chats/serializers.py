@@ -1,6 +1,8 @@
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
-from .models import User, Conversation, Message
+from .models import User, Conversation, Message, ReadState
 
 class UserSerializer(serializers.ModelSerializer):
     phone_number = serializers.CharField(required=False)
@@ -24,13 +26,139 @@ class MessageSerializer(serializers.ModelSerializer):
 
 class ConversationSerializer(serializers.ModelSerializer):
     participants = UserSerializer(many=True, read_only=True)
-    messages = MessageSerializer(many=True, read_only=True, source='messages')
+    # Recent window only, see ConversationViewSet.get_queryset
+    messages = MessageSerializer(many=True, read_only=True, source='recent_messages')
     last_message = serializers.SerializerMethodField()
+    unread_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Conversation
-        fields = ['conversation_id', 'participants', 'created_at', 'messages', 'last_message']
+        fields = ['conversation_id', 'participants', 'created_at', 'messages', 'last_message',
+                  'last_message_at', 'message_count', 'unread_count']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Messages are opt-in with ?include=messages
+        if not self.context.get('include_messages'):
+            self.fields.pop('messages')
 
     def get_last_message(self, obj):
+        # Precomputed by ConversationViewSet.get_queryset; query only as a fallback
+        if hasattr(obj, 'last_message_body'):
+            return obj.last_message_body
         last = obj.messages.order_by('-sent_at').first()
         return last.message_body if last else None
+
+    def get_unread_count(self, obj):
+        # The request user's read state, annotated by ConversationViewSet.get_queryset
+        if hasattr(obj, 'unread_count'):
+            return obj.unread_count
+        request = self.context.get('request')
+        if request is None:
+            return None
+        return ReadState.objects.filter(conversation=obj, user=request.user).values_list('unread_count', flat=True).first()
+
+
+# Fast read path for the list endpoints: builds the same output as the
+# serializers above straight from .values() rows, without per-field
+# ModelSerializer machinery, and renders each user once per page.
+
+USER_VALUES = UserSerializer.Meta.fields
+MESSAGE_VALUES = ['message_id', 'conversation_id', 'sender_id', 'message_body', 'sent_at', 'created_at']
+CONVERSATION_VALUES = ['conversation_id', 'created_at', 'last_message_body', 'last_message_at', 'message_count', 'unread_count']
+
+
+def format_datetime(value):
+    """
+    ISO 8601 the way DRF's DateTimeField renders it: in the active time
+    zone, 'Z' for UTC
+    """
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def user_representation(row):
+    return {
+        'user_id': str(row['user_id']),
+        'username': row['username'],
+        'email': row['email'],
+        'first_name': row['first_name'],
+        'last_name': row['last_name'],
+        'phone_number': row['phone_number'],
+    }
+
+
+class UserRepresentations(dict):
+    """
+    Per-page cache of user representations keyed by user_id
+    """
+
+    def load(self, user_ids):
+        """
+        Fetch the users not cached yet, in one query
+        """
+        missing = set(user_ids).difference(self)
+        if missing:
+            for row in User.objects.filter(pk__in=missing).values(*USER_VALUES):
+                self[row['user_id']] = user_representation(row)
+        return self
+
+
+def message_representation(row, users):
+    return {
+        'message_id': str(row['message_id']),
+        'conversation': row['conversation_id'],
+        'sender': users[row['sender_id']],
+        'message_body': row['message_body'],
+        'sent_at': format_datetime(row['sent_at']),
+        'created_at': format_datetime(row['created_at']),
+    }
+
+
+def serialize_messages(rows, users=None):
+    """
+    MessageSerializer(many=True).data for MESSAGE_VALUES rows
+    """
+    users = (UserRepresentations() if users is None else users).load(row['sender_id'] for row in rows)
+    return [message_representation(row, users) for row in rows]
+
+
+def serialize_conversations(rows, messages=None):
+    """
+    ConversationSerializer(many=True).data for CONVERSATION_VALUES rows.
+    `messages` holds the MESSAGE_VALUES rows of the recent window when
+    messages are included, None otherwise.
+    """
+    ids = [row['conversation_id'] for row in rows]
+    users = UserRepresentations()
+    participants = {pk: [] for pk in ids}
+    for row in User.objects.filter(conversations__in=ids).values('conversations', *USER_VALUES):
+        if row['user_id'] not in users:
+            users[row['user_id']] = user_representation(row)
+        participants[row['conversations']].append(users[row['user_id']])
+
+    recent = None
+    if messages is not None:
+        recent = {pk: [] for pk in ids}
+        for message in serialize_messages(list(messages), users):
+            recent[message['conversation']].append(message)
+
+    data = []
+    for row in rows:
+        conversation = {
+            'conversation_id': str(row['conversation_id']),
+            'participants': participants[row['conversation_id']],
+            'created_at': format_datetime(row['created_at']),
+        }
+        if recent is not None:
+            conversation['messages'] = recent[row['conversation_id']]
+        conversation['last_message'] = row['last_message_body']
+        conversation['last_message_at'] = row['last_message_at'] and format_datetime(row['last_message_at'])
+        conversation['message_count'] = row['message_count']
+        conversation['unread_count'] = row['unread_count']
+        data.append(conversation)
+    return data
@@ -0,0 +1,42 @@
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from .events import publish_messages
+from .membership import invalidate_membership_on_commit
+from .models import Conversation, Message, ReadState
+from .summary import add_read_states, record_messages
+
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def participants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # pk_set is not given for clear(), so collect the users before they go
+        if reverse:
+            invalidate_membership_on_commit([instance.pk])
+            ReadState.objects.filter(user=instance).delete()
+        else:
+            invalidate_membership_on_commit(instance.participants.values_list('pk', flat=True))
+            ReadState.objects.filter(conversation=instance).delete()
+    elif action in ('post_add', 'post_remove'):
+        # Forward: instance is a Conversation and pk_set its users; reverse: the other way round
+        invalidate_membership_on_commit([instance.pk] if reverse else pk_set)
+        pairs = [(instance.pk, pk) if reverse else (pk, instance.pk) for pk in pk_set]
+        if action == 'post_add':
+            add_read_states(pairs)
+        elif reverse:
+            ReadState.objects.filter(user=instance, conversation__in=pk_set).delete()
+        else:
+            ReadState.objects.filter(conversation=instance, user__in=pk_set).delete()
+
+
+@receiver(pre_delete, sender=Conversation)
+def conversation_deleted(sender, instance, **kwargs):
+    invalidate_membership_on_commit(instance.participants.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Message)
+def message_created(sender, instance, created, **kwargs):
+    # bulk_create sends no signals; MessageViewSet.bulk records and publishes itself
+    if created:
+        record_messages([instance])
+        publish_messages([instance])
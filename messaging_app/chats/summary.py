@@ -0,0 +1,147 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Subquery, UUIDField, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Conversation, Message, ReadState
+
+# Denormalized conversation summaries (last message, message count) and
+# per-participant read state (unread count, inbox recency). Message
+# create/delete paths keep them current in their own transaction with a
+# few UPDATEs per conversation; rebuild_summaries() recomputes them for
+# changes made behind the API's back.
+
+
+def record_messages(messages):
+    """
+    Fold newly created messages into their conversations' summaries and
+    the other participants' unread counts
+    """
+    by_conversation = defaultdict(list)
+    for message in messages:
+        by_conversation[message.conversation_id].append(message)
+
+    for conversation_id, batch in by_conversation.items():
+        last = max(batch, key=lambda message: (message.sent_at, message.message_id))
+        # Concurrent writers may commit out of order; the newest message wins
+        newer = Q(last_message_at__isnull=True) | Q(last_message_at__lte=last.sent_at)
+        Conversation.objects.filter(pk=conversation_id).update(
+            message_count=F('message_count') + len(batch),
+            last_message=Case(When(newer, then=Value(last.pk)), default=F('last_message'), output_field=UUIDField()),
+            last_message_at=Case(When(newer, then=Value(last.sent_at)), default=F('last_message_at')),
+        )
+        # Own messages are not unread
+        senders = Counter(message.sender_id for message in batch)
+        ReadState.objects.filter(conversation=conversation_id).update(
+            unread_count=F('unread_count') + Case(
+                *[When(user=sender, then=Value(len(batch) - sent)) for sender, sent in senders.items()],
+                default=Value(len(batch)),
+            ),
+            last_activity_at=Greatest(F('last_activity_at'), Value(last.sent_at)),
+        )
+
+
+def latest_messages(conversation):
+    return Message.objects.filter(conversation=conversation).order_by('-sent_at', '-message_id')
+
+
+def forget_message(message):
+    """
+    Take a deleted message out of its conversation's summary and of the
+    unread counts of the participants who had not read it
+    """
+    conversation_id = message.conversation_id
+    latest = latest_messages(conversation_id)
+    Conversation.objects.filter(pk=conversation_id).update(
+        message_count=Greatest(F('message_count') - 1, Value(0)),
+        last_message=Subquery(latest.values('pk')[:1]),
+        last_message_at=Subquery(latest.values('sent_at')[:1]),
+    )
+    states = ReadState.objects.filter(conversation=conversation_id)
+    states.exclude(user=message.sender_id).filter(
+        Q(last_read_at__isnull=True) | Q(last_read_at__lt=message.sent_at), unread_count__gt=0,
+    ).update(unread_count=F('unread_count') - 1)
+    states.update(last_activity_at=Coalesce(Subquery(latest.values('sent_at')[:1]), Value(message.conversation.created_at)))
+
+
+def add_read_states(pairs):
+    """
+    Create the read states of new (user_id, conversation_id) participations;
+    a new participant starts with the existing history read
+    """
+    pairs = list(pairs)
+    summaries = {
+        row['pk']: row
+        for row in Conversation.objects.filter(pk__in={conversation for _, conversation in pairs})
+        .values('pk', 'created_at', 'last_message_at')
+    }
+    ReadState.objects.bulk_create(
+        [
+            ReadState(
+                user_id=user, conversation_id=conversation,
+                last_activity_at=summaries[conversation]['last_message_at'] or summaries[conversation]['created_at'],
+                last_read_at=summaries[conversation]['last_message_at'],
+            )
+            for user, conversation in pairs
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def mark_read(user, conversation_id):
+    """
+    Mark a conversation read by user up to its last message
+    """
+    last_message_at = Conversation.objects.filter(pk=OuterRef('conversation')).values('last_message_at')[:1]
+    ReadState.objects.filter(user=user, conversation=conversation_id).update(
+        unread_count=0, last_read_at=Subquery(last_message_at),
+    )
+
+
+def rebuild_summaries(conversation_ids=None):
+    """
+    Recompute conversation summaries and read states from the messages and
+    participants themselves, for all conversations or the given ones
+    """
+    Participant = Conversation.participants.through
+
+    conversations = Conversation.objects.all()
+    if conversation_ids is not None:
+        conversations = conversations.filter(pk__in=conversation_ids)
+
+    def count(messages):
+        return Coalesce(Subquery(messages.order_by().values('conversation').annotate(n=Count('pk')).values('n')), 0)
+
+    latest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-sent_at', '-message_id')
+    rebuilt = conversations.update(
+        message_count=count(Message.objects.filter(conversation=OuterRef('pk'))),
+        last_message=Subquery(latest.values('pk')[:1]),
+        last_message_at=Subquery(latest.values('sent_at')[:1]),
+    )
+
+    # Read states match the participants, one each
+    participants = Participant.objects.filter(conversation__in=conversations)
+    states = ReadState.objects.filter(conversation__in=conversations)
+    states.exclude(Exists(participants.filter(user=OuterRef('user'), conversation=OuterRef('conversation')))).delete()
+    missing = participants.exclude(Exists(states.filter(user=OuterRef('user'), conversation=OuterRef('conversation'))))
+    ReadState.objects.bulk_create(
+        (
+            ReadState(user_id=user, conversation_id=conversation, last_activity_at=last_message_at or created_at,
+                      last_read_at=last_message_at)
+            for user, conversation, last_message_at, created_at in missing.values_list(
+                'user', 'conversation', 'conversation__last_message_at', 'conversation__created_at')
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+    # Unread: messages from others after last_read_at (all of them if never read)
+    unread = Message.objects.filter(conversation=OuterRef('conversation')).exclude(sender=OuterRef('user'))
+    states.filter(last_read_at__isnull=True).update(unread_count=count(unread))
+    states.filter(last_read_at__isnull=False).update(
+        unread_count=count(unread.filter(sent_at__gt=OuterRef('last_read_at'))),
+    )
+    activity = Conversation.objects.filter(pk=OuterRef('conversation')).values(
+        activity=Coalesce('last_message_at', 'created_at'))
+    states.update(last_activity_at=Subquery(activity[:1]))
+    return rebuilt
@@ -1,7 +1,775 @@
+import asyncio
+import base64
+import csv
+import datetime
+import io
+import json
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from django.db import connection
 from django.test import TestCase
-from .models import Message
+from django.test.utils import CaptureQueriesContext
+from rest_framework import viewsets
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from .events import event_stream
+from .membership import conversation_ids, is_participant
+from .models import User, Conversation, Message, ReadState
+from .parsers import FastJSONParser
+from .pubsub import InMemoryBroker, conversation_channel
+from .renderers import FastJSONRenderer
+from .serializers import MessageSerializer
+from .views import ConversationViewSet, MessageViewSet
 
 class MessageModelTest(TestCase):
     def test_create_message(self):
-        msg = Message.objects.create(sender="Alice", content="Hello, Bob!")
+        alice = User.objects.create_user(username="Alice", email="alice@example.com", password="pass")
+        conversation = Conversation.objects.create()
+        msg = Message.objects.create(conversation=conversation, sender=alice, message_body="Hello, Bob!")
         self.assertEqual(str(msg), "Alice: Hello, Bob!")
+
+
+class ConversationListQueryTest(APITestCase):
+    """
+    The conversation list must run a constant number of queries per page,
+    however many conversations, participants and messages it holds.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", email="alice@example.com", password="pass")
+        self.others = [
+            User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="pass")
+            for i in range(3)
+        ]
+        self.client.force_authenticate(self.user)
+
+    def add_conversations(self, count):
+        for _ in range(count):
+            conversation = Conversation.objects.create()
+            conversation.participants.set([self.user, *self.others])
+            for sender in [self.user, *self.others]:
+                Message.objects.create(conversation=conversation, sender=sender, message_body=f"from {sender.username}")
+
+    def count_list_queries(self, query=""):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/conversations/{query}")
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data["results"]
+
+    def test_constant_queries_per_page(self):
+        for query in ["", "?include=messages"]:
+            Conversation.objects.all().delete()
+            self.add_conversations(2)
+            small, results = self.count_list_queries(query)
+            self.assertEqual(len(results), 2)
+
+            self.add_conversations(8)
+            large, results = self.count_list_queries(query)
+            self.assertEqual(len(results), 10)
+            self.assertEqual(small, large)
+
+    def test_last_message_is_latest(self):
+        self.add_conversations(1)
+        _, results = self.count_list_queries()
+        self.assertEqual(results[0]["last_message"], f"from {self.others[-1].username}")
+        self.assertEqual(len(results[0]["participants"]), 4)
+        self.assertNotIn("messages", results[0])
+
+
+class RecentMessagesWindowTest(APITestCase):
+    """
+    Conversations embed only their latest messages, and only on request.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", email="alice@example.com", password="pass")
+        self.client.force_authenticate(self.user)
+        self.conversations = []
+        for _ in range(2):
+            conversation = Conversation.objects.create()
+            conversation.participants.set([self.user])
+            for i in range(30):
+                Message.objects.create(conversation=conversation, sender=self.user, message_body=f"message {i}")
+            self.conversations.append(conversation)
+
+    def test_default_window(self):
+        response = self.client.get("/api/conversations/?include=messages")
+        for result in response.data["results"]:
+            bodies = [message["message_body"] for message in result["messages"]]
+            self.assertEqual(bodies, [f"message {i}" for i in range(10, 30)])
+
+    def test_messages_limit(self):
+        response = self.client.get("/api/conversations/?include=messages&messages_limit=3")
+        for result in response.data["results"]:
+            bodies = [message["message_body"] for message in result["messages"]]
+            self.assertEqual(bodies, ["message 27", "message 28", "message 29"])
+
+    def test_full_history_through_nested_route(self):
+        conversation = self.conversations[0]
+        response = self.client.get(f"/api/conversations/{conversation.pk}/messages/?page_size=100")
+        self.assertEqual(len(response.data["results"]), 30)
+        self.assertTrue(all(
+            message["conversation"] == conversation.pk for message in response.data["results"]
+        ))
+
+    def test_nested_route_with_invalid_conversation_id(self):
+        response = self.client.get("/api/conversations/not-a-uuid/messages/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [])
+        message = Message.objects.first()
+        response = self.client.get(f"/api/conversations/not-a-uuid/messages/{message.pk}/")
+        self.assertEqual(response.status_code, 404)
+
+
+class MessageCursorPaginationTest(APITestCase):
+    """
+    Messages page newest first through opaque (sent_at, message_id) cursors.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", email="alice@example.com", password="pass")
+        self.client.force_authenticate(self.user)
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.set([self.user])
+        for i in range(25):
+            Message.objects.create(conversation=self.conversation, sender=self.user, message_body=f"message {i}")
+        self.url = f"/api/conversations/{self.conversation.pk}/messages/?page_size=10"
+
+    def bodies(self, response):
+        return [message["message_body"] for message in response.data["results"]]
+
+    def test_walk_forward_and_back(self):
+        first = self.client.get(self.url)
+        self.assertNotIn("count", first.data)
+        self.assertIsNone(first.data["previous"])
+        self.assertEqual(self.bodies(first), [f"message {i}" for i in range(24, 14, -1)])
+
+        second = self.client.get(first.data["next"])
+        third = self.client.get(second.data["next"])
+        self.assertEqual(self.bodies(third), [f"message {i}" for i in range(4, -1, -1)])
+        self.assertIsNone(third.data["next"])
+
+        back = self.client.get(third.data["previous"])
+        self.assertEqual(self.bodies(back), self.bodies(second))
+
+    def test_ties_on_sent_at(self):
+        Message.objects.update(sent_at=self.conversation.created_at)
+        seen = []
+        url = self.url
+        while url:
+            response = self.client.get(url)
+            seen.extend(message["message_id"] for message in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(sorted(seen), sorted(str(pk) for pk in Message.objects.values_list("pk", flat=True)))
+
+    def test_new_messages_do_not_shift_pages(self):
+        first = self.client.get(self.url)
+        Message.objects.create(conversation=self.conversation, sender=self.user, message_body="late")
+        second = self.client.get(first.data["next"])
+        self.assertEqual(self.bodies(second), [f"message {i}" for i in range(14, 4, -1)])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url + "&cursor=garbage")
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_cursor_message_id(self):
+        for message_id in ["zzz", 42, None]:
+            position = {"s": "2024-05-01T12:00:00Z", "m": message_id}
+            cursor = base64.b64encode(json.dumps(position).encode()).decode()
+            response = self.client.get(self.url, {"cursor": cursor})
+            self.assertEqual(response.status_code, 404)
+
+
+class HotPathIndexTest(TestCase):
+    """
+    The planner must serve the hot chats queries from the composite indexes.
+    `benchmark_messages explain --messages 1000000` prints the same plans
+    for a full-size database.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="pass")
+            for i in range(10)
+        ]
+        cls.conversations = [Conversation.objects.create() for _ in range(50)]
+        for i, conversation in enumerate(cls.conversations):
+            conversation.participants.set(cls.users[i % 10:i % 10 + 2])
+        Message.objects.bulk_create(
+            Message(conversation=cls.conversations[i % 50], sender=cls.users[i % 10], message_body=f"message {i}")
+            for i in range(5000)
+        )
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, queryset, index):
+        self.assertIn(index, queryset.explain())
+
+    def test_conversation_history(self):
+        self.assertUsesIndex(
+            Message.objects.filter(conversation=self.conversations[0]).order_by("-sent_at", "-message_id")[:20],
+            "message_conv_sent_idx",
+        )
+
+    def test_conversation_created_at_range(self):
+        since = Message.objects.order_by("created_at")[2500].created_at
+        self.assertUsesIndex(
+            Message.objects.filter(conversation=self.conversations[0], created_at__gte=since).order_by("created_at"),
+            "message_conv_created_idx",
+        )
+
+    def test_sender_created_at_range(self):
+        since = Message.objects.order_by("created_at")[2500].created_at
+        self.assertUsesIndex(
+            Message.objects.filter(sender=self.users[0], created_at__gte=since).order_by("created_at"),
+            "message_sender_created_idx",
+        )
+
+    def test_conversations_of_user(self):
+        self.assertUsesIndex(
+            Conversation.objects.filter(participants=self.users[0]),
+            "participants_user_conv_idx",
+        )
+
+    def test_inbox(self):
+        self.assertUsesIndex(
+            Conversation.objects.filter(read_states__user=self.users[0])
+            .order_by("-read_states__last_activity_at", "-read_states__conversation"),
+            "read_state_inbox_idx",
+        )
+
+
+class MembershipCacheTest(APITestCase):
+    """
+    Participation checks read a cached per-user conversation set that the
+    participants m2m signals keep up to date.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com", password="pass")
+        self.bob = User.objects.create_user(username="bob", email="bob@example.com", password="pass")
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.set([self.alice])
+
+    def request(self, user):
+        return SimpleNamespace(user=user)
+
+    def test_memoized_and_cached(self):
+        request = self.request(self.alice)
+        with self.assertNumQueries(1):
+            self.assertTrue(is_participant(request, self.conversation.pk))
+            self.assertTrue(is_participant(request, str(self.conversation.pk)))
+        with self.assertNumQueries(0):
+            self.assertEqual(conversation_ids(self.request(self.alice)), {self.conversation.pk})
+
+    def change(self, fn, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            fn(*args)
+
+    def test_invalidated_on_participant_changes(self):
+        self.assertFalse(is_participant(self.request(self.bob), self.conversation.pk))
+        self.change(self.conversation.participants.add, self.bob)
+        self.assertTrue(is_participant(self.request(self.bob), self.conversation.pk))
+
+        self.change(self.conversation.participants.remove, self.bob)
+        self.assertFalse(is_participant(self.request(self.bob), self.conversation.pk))
+
+        self.change(self.bob.conversations.add, self.conversation)
+        self.assertTrue(is_participant(self.request(self.bob), self.conversation.pk))
+
+        self.change(self.conversation.participants.clear)
+        self.assertFalse(is_participant(self.request(self.alice), self.conversation.pk))
+        self.assertFalse(is_participant(self.request(self.bob), self.conversation.pk))
+
+    def test_invalidated_on_conversation_delete(self):
+        self.assertTrue(is_participant(self.request(self.alice), self.conversation.pk))
+        pk = self.conversation.pk
+        self.change(self.conversation.delete)
+        self.assertFalse(is_participant(self.request(self.alice), pk))
+
+    def test_invalidated_after_commit(self):
+        self.assertTrue(is_participant(self.request(self.alice), self.conversation.pk))
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.conversation.participants.remove(self.alice)
+            # Until the change commits, other requests may still see and cache the old set
+            self.assertTrue(is_participant(self.request(self.alice), self.conversation.pk))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(is_participant(self.request(self.alice), self.conversation.pk))
+
+    def test_create_message(self):
+        url = f"/api/conversations/{self.conversation.pk}/messages/"
+        self.client.force_authenticate(self.alice)
+        response = self.client.post(url, {"message_body": "hi"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["sender"]["username"], "alice")
+
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.client.post(url, {"message_body": "hi"}).status_code, 403)
+        self.assertEqual(
+            self.client.post("/api/conversations/00000000-0000-0000-0000-000000000000/messages/",
+                             {"message_body": "hi"}).status_code,
+            404,
+        )
+
+
+class BulkMessageIngestionTest(APITestCase):
+    """
+    Bulk ingestion writes whole batches of messages in a few queries.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com", password="pass")
+        self.bob = User.objects.create_user(username="bob", email="bob@example.com", password="pass")
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.set([self.alice])
+        self.url = f"/api/conversations/{self.conversation.pk}/messages/bulk/"
+        self.client.force_authenticate(self.alice)
+
+    def test_json_array(self):
+        items = [{"message_body": f"message {i}"} for i in range(2500)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, items, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {"created": 2500})
+        self.assertEqual(self.conversation.messages.filter(sender=self.alice).count(), 2500)
+        # One INSERT per batch (SQLite caps batches at 999 parameters), not per message
+        inserts = [query for query in queries if query["sql"].startswith("INSERT")]
+        self.assertLess(len(inserts), 25)
+
+    def test_ndjson(self):
+        body = '{"message_body": "one"}\n\n{"message_body": "two"}\n'
+        response = self.client.post(self.url, body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sorted(self.conversation.messages.values_list("message_body", flat=True)), ["one", "two"]
+        )
+
+    def test_invalid_items_write_nothing(self):
+        items = [{"message_body": "fine"}, {"message_body": "  "}, "nope"]
+        response = self.client.post(self.url, items, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data["errors"]), {1, 2})
+        self.assertFalse(Message.objects.exists())
+
+    def test_not_participant(self):
+        self.client.force_authenticate(self.bob)
+        response = self.client.post(self.url, [{"message_body": "hi"}], format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Message.objects.exists())
+
+
+class ConversationExportTest(APITestCase):
+    """
+    The export action streams the whole history without serializers.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com", password="pass")
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.set([self.alice])
+        Message.objects.bulk_create(
+            Message(conversation=self.conversation, sender=self.alice, message_body=f"message, {i}\n\"quoted\"")
+            for i in range(45)
+        )
+        self.url = f"/api/conversations/{self.conversation.pk}/export/"
+        self.client.force_authenticate(self.alice)
+
+    def expected(self):
+        messages = Message.objects.filter(conversation=self.conversation).order_by("sent_at", "message_id")
+        return [
+            {key: value for key, value in MessageSerializer(message).data.items() if key != "conversation"}
+            for message in messages
+        ]
+
+    def test_ndjson(self):
+        with patch.object(ConversationViewSet, "export_chunk_size", 10):
+            response = self.client.get(self.url)
+            self.assertTrue(response.streaming)
+            self.assertFalse(response.is_async)
+            chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 5)
+        rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            rows,
+            [
+                {
+                    "message_id": message["message_id"],
+                    "sender": message["sender"]["user_id"],
+                    "sender_username": message["sender"]["username"],
+                    "message_body": message["message_body"],
+                    "sent_at": message["sent_at"],
+                    "created_at": message["created_at"],
+                }
+                for message in self.expected()
+            ],
+        )
+
+    def test_csv(self):
+        response = self.client.get(self.url + "?output=csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ["message_id", "sender", "sender_username", "message_body", "sent_at", "created_at"])
+        self.assertEqual([row[3] for row in rows[1:]], [message["message_body"] for message in self.expected()])
+
+    async def test_asgi(self):
+        credentials = base64.b64encode(b"alice:pass").decode()
+        for output in ("ndjson", "csv"):
+            with patch.object(ConversationViewSet, "export_chunk_size", 10):
+                response = await self.async_client.get(
+                    f"{self.url}?output={output}", headers={"Authorization": f"Basic {credentials}"}
+                )
+                self.assertTrue(response.is_async)
+                content = b"".join([chunk async for chunk in response.streaming_content])
+            sync = await sync_to_async(lambda: b"".join(self.client.get(f"{self.url}?output={output}").streaming_content))()
+            self.assertEqual(content, sync)
+
+    def test_unknown_output(self):
+        self.assertEqual(self.client.get(self.url + "?output=xml").status_code, 400)
+
+    def test_not_participant(self):
+        bob = User.objects.create_user(username="bob", email="bob@example.com", password="pass")
+        self.client.force_authenticate(bob)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class FastReadPathTest(APITestCase):
+    """
+    The list endpoints skip ModelSerializer but render exactly the same bytes.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com", password="pass",
+                                              first_name="Alice", phone_number="+15550100")
+        self.bob = User.objects.create_user(username="bob", email="bob@example.com", password="pass")
+        self.carol = User.objects.create_user(username="carol", email="carol@example.com", password="pass")
+        self.conversations = []
+        for others in [[self.bob], [self.bob, self.carol], []]:
+            conversation = Conversation.objects.create()
+            conversation.participants.set([self.alice, *others])
+            for i, sender in enumerate([self.alice, *others] * 3):
+                Message.objects.create(conversation=conversation, sender=sender, message_body=f"message é {i}")
+            self.conversations.append(conversation)
+        self.client.force_authenticate(self.alice)
+
+    def assertSameBytes(self, viewset, url):
+        fast = self.client.get(url)
+        with patch.object(viewset, "list", viewsets.ModelViewSet.list):
+            slow = self.client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+
+    def test_messages(self):
+        self.assertSameBytes(MessageViewSet, f"/api/conversations/{self.conversations[1].pk}/messages/?page_size=5")
+
+    def test_conversations(self):
+        self.assertSameBytes(ConversationViewSet, "/api/conversations/")
+
+    def test_conversations_with_messages(self):
+        self.assertSameBytes(ConversationViewSet, "/api/conversations/?include=messages&messages_limit=4")
+
+    def test_active_time_zone(self):
+        with timezone.override("Europe/Paris"):
+            self.assertSameBytes(MessageViewSet, f"/api/conversations/{self.conversations[1].pk}/messages/")
+            self.assertSameBytes(ConversationViewSet, "/api/conversations/?include=messages")
+
+    def test_senders_fetched_once_per_page(self):
+        url = f"/api/conversations/{self.conversations[1].pk}/messages/"
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        user_queries = [query for query in queries if query["sql"].startswith('SELECT "chats_user"')]
+        self.assertEqual(len(user_queries), 1)
+
+
+class FastJSONTest(TestCase):
+    """
+    FastJSONRenderer/FastJSONParser are drop-in replacements for DRF's JSON
+    renderer and parser, with or without orjson.
+    """
+    payload = {
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "utc": datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        "offset": datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=5, minutes=30))),
+        "naive": datetime.datetime(2024, 5, 1, 12, 30),
+        "date": datetime.date(2024, 5, 1),
+        "time": datetime.time(8, 15, 30, 500),
+        "decimal": Decimal("12.50"),
+        "lazy": gettext_lazy("This field is required."),
+        "detail": ErrorDetail("Invalid cursor", code="not_found"),
+        "int_keys": {1: "one", 2: ["two", None, True, 2.5]},
+        "text": "héllo \u2028 wörld \u2029 ✓",
+        "nested": [{"a": [], "b": {}}],
+    }
+
+    def test_same_bytes_as_json_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(self.payload), JSONRenderer().render(self.payload))
+
+    def test_without_orjson(self):
+        with patch("chats.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(self.payload), JSONRenderer().render(self.payload))
+
+    def test_orjson_without_floats(self):
+        payload = {key: value for key, value in self.payload.items() if key not in ("decimal", "int_keys")}
+        expected = JSONRenderer().render(payload)
+        with patch.object(JSONRenderer, "render", side_effect=AssertionError("fell back")):
+            self.assertEqual(FastJSONRenderer().render(payload), expected)
+
+    def test_non_finite_floats(self):
+        for value in [float("nan"), float("inf"), -float("inf"), Decimal("NaN")]:
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({"value": [value]})
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render({"value": [value]})
+
+    def test_big_ints(self):
+        payload = {"big": [2 ** 64, -(2 ** 63) - 1, 10 ** 30], "nested": {"n": 2 ** 100}}
+        self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_exponent_floats(self):
+        payload = {"floats": [1e16, 1e-7, 1.5e300, 0.1, -0.0], "decimal": Decimal("1E+16"), 1.5: "float key"}
+        self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+        self.assertIn(b"1e+16", FastJSONRenderer().render(payload))
+
+    def test_indent_falls_back(self):
+        context = {"indent": 4}
+        self.assertEqual(
+            FastJSONRenderer().render(self.payload, renderer_context=context),
+            JSONRenderer().render(self.payload, renderer_context=context),
+        )
+
+    def test_none(self):
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_parser(self):
+        body = JSONRenderer().render(self.payload)
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(body)),
+            JSONParser().parse(io.BytesIO(body)),
+        )
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"broken": '))
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"nan": NaN}'))
+
+
+class ConversationEventsTest(TestCase):
+    """
+    New messages are pushed to subscribers of their conversation as
+    server-sent events.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com", password="pass")
+        self.bob = User.objects.create_user(username="bob", email="bob@example.com", password="pass")
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.set([self.alice])
+        self.url = f"/api/conversations/{self.conversation.pk}/events/"
+
+    def send(self, *bodies):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [
+                Message.objects.create(conversation=self.conversation, sender=self.alice, message_body=body)
+                for body in bodies
+            ]
+
+    def auth(self, username):
+        credentials = base64.b64encode(f"{username}:pass".encode()).decode()
+        return {"Authorization": f"Basic {credentials}"}
+
+    async def test_broker(self):
+        broker = InMemoryBroker(queue_size=2)
+        async with broker.subscribe("a") as queue:
+            self.assertEqual(broker.subscriber_count("a"), 1)
+            for event in range(3):
+                self.assertEqual(broker.publish("a", event), 1)
+            self.assertEqual(broker.publish("b", "other"), 0)
+            await asyncio.sleep(0)
+            # Full queues drop their oldest events
+            self.assertEqual([queue.get_nowait(), queue.get_nowait()], [1, 2])
+        self.assertEqual(broker.subscriber_count("a"), 0)
+
+    async def test_new_messages_are_pushed(self):
+        stream = event_stream(self.conversation.pk)
+        self.assertEqual(await anext(stream), "retry: 3000\n\n")
+        message, = await sync_to_async(self.send)("hello")
+        event = await asyncio.wait_for(anext(stream), 1)
+        await stream.aclose()
+
+        lines = event.splitlines()
+        self.assertEqual(lines[:2], [f"id: {message.pk}", "event: message"])
+        data = json.loads(lines[2].removeprefix("data: "))
+        self.assertEqual(data, json.loads(JSONRenderer().render(MessageSerializer(message).data)))
+
+    async def test_reconnect_catches_up(self):
+        first, second, third = await sync_to_async(self.send)("one", "two", "three")
+        stream = event_stream(self.conversation.pk, last_event_id=str(first.pk))
+        await anext(stream)
+        events = [await anext(stream), await anext(stream)]
+        await stream.aclose()
+        self.assertEqual([event.splitlines()[0] for event in events], [f"id: {second.pk}", f"id: {third.pk}"])
+
+    async def test_view(self):
+        response = await self.async_client.get(self.url, headers=self.auth("alice"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertTrue(response.is_async)
+        stream = response.streaming_content
+        self.assertEqual(await anext(stream), b"retry: 3000\n\n")
+        await stream.aclose()
+
+    def test_view_under_wsgi(self):
+        first, second = self.send("one", "two")
+        response = self.client.get(self.url, headers=self.auth("alice"))
+        self.assertFalse(response.is_async)
+        self.assertEqual(b"".join(response.streaming_content), f"retry: 3000\n\nid: {second.pk}\n\n".encode())
+
+        response = self.client.get(self.url, headers={**self.auth("alice"), "Last-Event-ID": str(first.pk)})
+        events = b"".join(response.streaming_content).decode().split("\n\n")
+        self.assertEqual(events[0], "retry: 3000")
+        self.assertEqual(events[1].splitlines()[0], f"id: {second.pk}")
+        self.assertEqual(events[2:], [""])
+
+    def test_invalid_last_event_id(self):
+        message, = self.send("one")
+        for last_event_id in ("garbage", f"{message.pk}0", ""):
+            response = self.client.get(self.url, headers={**self.auth("alice"), "Last-Event-ID": last_event_id})
+            self.assertEqual(b"".join(response.streaming_content), f"retry: 3000\n\nid: {message.pk}\n\n".encode())
+
+    async def test_view_access(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(self.url, headers=self.auth("bob"))
+        self.assertEqual(response.status_code, 404)
+
+
+class ConversationSummaryTest(APITestCase):
+    """
+    Conversation summaries and unread counts follow message creation and
+    deletion, and rebuild_conversation_summaries recomputes them.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com", password="pass")
+        self.bob = User.objects.create_user(username="bob", email="bob@example.com", password="pass")
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.set([self.alice, self.bob])
+        self.url = f"/api/conversations/{self.conversation.pk}/messages/"
+
+    def send(self, user, body):
+        self.client.force_authenticate(user)
+        response = self.client.post(self.url, {"message_body": body}, format="json")
+        self.assertEqual(response.status_code, 201)
+        return Message.objects.get(pk=response.data["message_id"])
+
+    def summary(self):
+        conversation = Conversation.objects.get(pk=self.conversation.pk)
+        unread = dict(ReadState.objects.filter(conversation=conversation).values_list("user__username", "unread_count"))
+        return conversation.message_count, conversation.last_message_id, unread
+
+    def test_new_messages(self):
+        self.send(self.alice, "one")
+        last = self.send(self.bob, "two")
+        self.assertEqual(self.summary(), (2, last.pk, {"alice": 1, "bob": 1}))
+
+        self.client.force_authenticate(self.alice)
+        response = self.client.post(f"{self.url}bulk/", [{"message_body": f"more {i}"} for i in range(3)], format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.summary()[::2], (5, {"alice": 1, "bob": 4}))
+
+    def test_deleted_message(self):
+        first = self.send(self.alice, "one")
+        last = self.send(self.alice, "two")
+        response = self.client.delete(f"{self.url}{last.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.summary(), (1, first.pk, {"alice": 0, "bob": 1}))
+
+    def test_mark_read(self):
+        self.send(self.alice, "one")
+        self.client.force_authenticate(self.bob)
+        response = self.client.post(f"/api/conversations/{self.conversation.pk}/read/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.summary()[2], {"alice": 0, "bob": 0})
+        self.send(self.alice, "two")
+        self.assertEqual(self.summary()[2], {"alice": 0, "bob": 1})
+
+    def test_new_participant_starts_read(self):
+        self.send(self.alice, "one")
+        carol = User.objects.create_user(username="carol", email="carol@example.com", password="pass")
+        self.conversation.participants.add(carol)
+        self.send(self.bob, "two")
+        self.assertEqual(self.summary()[2], {"alice": 1, "bob": 1, "carol": 1})
+        self.conversation.participants.remove(carol)
+        self.assertEqual(self.summary()[2], {"alice": 1, "bob": 1})
+
+    def test_inbox(self):
+        older, newer = self.conversation, Conversation.objects.create()
+        newer.participants.set([self.alice, self.bob])
+        self.send(self.alice, "old")
+        Message.objects.create(conversation=newer, sender=self.alice, message_body="new")
+        self.client.force_authenticate(self.bob)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/conversations/")
+        results = response.data["results"]
+        self.assertEqual([row["conversation_id"] for row in results], [str(newer.pk), str(older.pk)])
+        self.assertEqual(
+            [(row["last_message"], row["message_count"], row["unread_count"]) for row in results],
+            [("new", 1, 1), ("old", 1, 1)],
+        )
+        # No subquery over messages in the page or count queries
+        for query in queries:
+            if "chats_readstate" in query["sql"]:
+                self.assertNotIn("(SELECT", query["sql"])
+
+    def test_detail_access_by_participants(self):
+        # A lost read state hides the conversation from the inbox only
+        self.send(self.bob, "one")
+        ReadState.objects.filter(user=self.alice).delete()
+        self.client.force_authenticate(self.alice)
+        detail = f"/api/conversations/{self.conversation.pk}/"
+        self.assertEqual(self.client.get("/api/conversations/").data["count"], 0)
+        response = self.client.get(detail)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["message_count"], response.data["unread_count"]), (1, None))
+        self.assertEqual(self.client.get(f"{detail}export/").status_code, 200)
+        self.assertEqual(self.client.post(f"{detail}read/").status_code, 204)
+
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.client.get(detail).data["unread_count"], 0)
+
+    def test_rebuild(self):
+        self.send(self.alice, "one")
+        self.send(self.bob, "two")
+        self.client.post(f"/api/conversations/{self.conversation.pk}/read/")
+        last = self.send(self.alice, "three")
+        self.assertEqual(self.summary(), (3, last.pk, {"alice": 1, "bob": 1}))
+
+        # Out of band changes: raw updates, a lost read state, a delete outside the API
+        Conversation.objects.update(message_count=0, last_message=None, last_message_at=None)
+        ReadState.objects.update(unread_count=7)
+        ReadState.objects.filter(user=self.alice).delete()
+        call_command("rebuild_conversation_summaries", stdout=io.StringIO())
+        # A missing read state comes back with the history read
+        self.assertEqual(self.summary(), (3, last.pk, {"alice": 0, "bob": 1}))
+
+        last.delete()
+        call_command("rebuild_conversation_summaries", str(self.conversation.pk), stdout=io.StringIO())
+        self.assertEqual(self.summary()[::2], (2, {"alice": 0, "bob": 0}))
@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework_nested import routers
+from .events import conversation_events
 from .views import ConversationViewSet, MessageViewSet
 
 router = routers.DefaultRouter()
@@ -12,4 +13,6 @@ conversations_router.register(r'messages', MessageViewSet, basename='conversatio
 urlpatterns = [
     path('', include(router.urls)),
     path('', include(conversations_router.urls)),
+    # Server-sent events with the conversation's new messages (polled under WSGI)
+    path('conversations/<uuid:pk>/events/', conversation_events, name='conversation-events'),
 ]
@@ -1,14 +1,34 @@
 from rest_framework import viewsets, status, filters
+from rest_framework.decorators import action
+from rest_framework.settings import api_settings
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import F, OuterRef, Prefetch, Subquery, Window
+from django.db.models.functions import RowNumber
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
+from .events import publish_messages
+from .export import astream_csv, astream_ndjson, stream_csv, stream_ndjson
 from .filters import MessageFilter
+from .pagination import MessageCursorPagination
+from .parsers import NDJSONParser
 
 
-from .models import Conversation, Message
-from .serializers import ConversationSerializer, MessageSerializer
+from .membership import is_participant, to_conversation_id
+from .models import Conversation, Message, ReadState
+from .summary import forget_message, mark_read, record_messages
+from .serializers import (
+    CONVERSATION_VALUES,
+    MESSAGE_VALUES,
+    ConversationSerializer,
+    MessageSerializer,
+    serialize_conversations,
+    serialize_messages,
+)
 from .permissions import (
     IsConversationParticipant,
     IsMessageOwnerOrParticipant,
@@ -16,15 +36,136 @@ from .permissions import (
 )
 
 
+def recent_messages(limit):
+    """
+    Messages queryset keeping only the `limit` latest of each conversation,
+    numbered with ROW_NUMBER() so one query serves a whole page.
+    """
+    return (
+        Message.objects.select_related('sender')
+        .annotate(recency=Window(
+            RowNumber(),
+            partition_by=F('conversation'),
+            order_by=F('sent_at').desc(),
+        ))
+        .filter(recency__lte=limit)
+        .order_by('sent_at')
+    )
+
+
 class ConversationViewSet(viewsets.ModelViewSet):
     serializer_class = ConversationSerializer
     permission_classes = [IsAuthenticated, IsConversationParticipant | CanCreateConversation]
     filter_backends = [filters.SearchFilter]
     search_fields = ['participants__username']
+    # Messages embedded per conversation with ?include=messages
+    recent_messages_limit = 20
+    max_recent_messages_limit = 100
+
+    def include_messages(self):
+        include = self.request.query_params.get('include', '')
+        return 'messages' in include.split(',')
+
+    def get_recent_messages_limit(self):
+        try:
+            limit = int(self.request.query_params['messages_limit'])
+        except (KeyError, ValueError):
+            return self.recent_messages_limit
+        return max(1, min(limit, self.max_recent_messages_limit))
 
     def get_queryset(self):
-        # ✅ Only return conversations the user is part of
-        return Conversation.objects.filter(participants=self.request.user)
+        if self.action == 'list':
+            # ✅ The inbox reads the user's read states: one range scan of
+            # read_state_inbox_idx, most recent first
+            queryset = (
+                Conversation.objects.filter(read_states__user=self.request.user)
+                .annotate(unread_count=F('read_states__unread_count'))
+                .order_by('-read_states__last_activity_at', '-read_states__conversation')
+            )
+        else:
+            # ✅ Access to one conversation goes by its participants, not the
+            # denormalized read states
+            unread = ReadState.objects.filter(conversation=OuterRef('pk'), user=self.request.user)
+            queryset = (
+                Conversation.objects.filter(participants=self.request.user)
+                .annotate(unread_count=Subquery(unread.values('unread_count')[:1]))
+            )
+        queryset = (
+            # Denormalized summary, no per-conversation aggregate over messages
+            queryset.annotate(last_message_body=F('last_message__message_body'))
+            # One query for all participants of the page
+            .prefetch_related('participants')
+        )
+        if self.include_messages():
+            # Only a bounded window; full history is under /conversations/<id>/messages/
+            queryset = queryset.prefetch_related(Prefetch(
+                'messages',
+                queryset=recent_messages(self.get_recent_messages_limit()),
+                to_attr='recent_messages',
+            ))
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_messages'] = self.include_messages()
+        return context
+
+    def list(self, request, *args, **kwargs):
+        # ✅ Fast read path: .values() rows, same output as ConversationSerializer
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        page = self.paginate_queryset(queryset.values(*CONVERSATION_VALUES))
+        rows = list(page if page is not None else queryset.values(*CONVERSATION_VALUES))
+        messages = None
+        if self.include_messages():
+            messages = recent_messages(self.get_recent_messages_limit()).filter(
+                conversation__in=[row['conversation_id'] for row in rows]
+            ).values(*MESSAGE_VALUES)
+        data = serialize_conversations(rows, messages)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    # Streaming export formats (WSGI and ASGI iterators) and rows fetched
+    # per database round trip
+    export_formats = {
+        'ndjson': (stream_ndjson, astream_ndjson, 'application/x-ndjson'),
+        'csv': (stream_csv, astream_csv, 'text/csv'),
+    }
+    export_chunk_size = 2000
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        """
+        Stream the full message history as NDJSON (default) or CSV (?output=csv).
+        Rows are read with values_list() in chunks and written without
+        serializers, so memory stays flat however long the conversation is.
+        ASGI servers get an async iterator, since they would collect a sync
+        one into a list before sending it.
+        """
+        output = request.query_params.get('output', 'ndjson')
+        if output not in self.export_formats:
+            return Response({"error": f"output must be one of {', '.join(self.export_formats)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        conversation = self.get_object()
+        stream, astream, content_type = self.export_formats[output]
+        if isinstance(request._request, ASGIRequest):
+            stream = astream
+        response = StreamingHttpResponse(
+            stream(Message.objects.filter(conversation=conversation), self.export_chunk_size),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="conversation-{conversation.pk}.{output}"'
+        return response
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, *args, **kwargs):
+        """
+        Mark the conversation read up to its last message, clearing the
+        request user's unread count
+        """
+        conversation = self.get_object()
+        mark_read(request.user, conversation.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     def create(self, request, *args, **kwargs):
         participants = request.data.get('participants', [])
@@ -32,8 +173,8 @@ class ConversationViewSet(viewsets.ModelViewSet):
             return Response({"error": "Participants list is required."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Ensure the current user is added as a participant if not already included
-        if request.user.id not in participants:
-            participants.append(request.user.id)
+        if str(request.user.pk) not in map(str, participants):
+            participants.append(request.user.pk)
 
         conversation = Conversation.objects.create()
         conversation.participants.set(participants)
@@ -46,36 +187,109 @@ class ConversationViewSet(viewsets.ModelViewSet):
 class MessageViewSet(viewsets.ModelViewSet):
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated, IsMessageOwnerOrParticipant]
-     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    # Newest first on (sent_at, message_id); the cursor fixes the ordering
+    pagination_class = MessageCursorPagination
+    filter_backends = [DjangoFilterBackend]
     filterset_class = MessageFilter
-    ordering_fields = ['created_at']
 
     def get_queryset(self):
         # ✅ Only return messages from conversations the user is part of
-        return Message.objects.filter(conversation__participants=self.request.user)
+        queryset = Message.objects.filter(conversation__participants=self.request.user)
+        if 'conversation_pk' in self.kwargs:
+            # Full history of one conversation through the nested route
+            conversation_id = to_conversation_id(self.kwargs['conversation_pk'])
+            if conversation_id is None:
+                return queryset.none()
+            queryset = queryset.filter(conversation=conversation_id)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        # ✅ Fast read path: .values() rows, same output as MessageSerializer
+        queryset = self.filter_queryset(self.get_queryset()).values(*MESSAGE_VALUES)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_messages(page))
+        return Response(serialize_messages(list(queryset)))
 
     def create(self, request, *args, **kwargs):
-        conversation_id = request.data.get('conversation_id')
+        conversation_id = to_conversation_id(
+            self.kwargs.get('conversation_pk') or request.data.get('conversation_id')
+        )
         if not conversation_id:
             return Response({"error": "conversation_id is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        conversation = get_object_or_404(Conversation, id=conversation_id)
-
-        # ✅ Check if user is participant
-        if not conversation.participants.filter(id=request.user.id).exists():
+        # ✅ Check if user is participant (cached membership set, no query)
+        if not is_participant(request, conversation_id):
+            get_object_or_404(Conversation, pk=conversation_id)
             return Response({"detail": "You are not a participant in this conversation."}, status=status.HTTP_403_FORBIDDEN)
 
         data = request.data.copy()
-        data['sender'] = request.user.pk
-        data['conversation'] = conversation.pk
+        data['conversation'] = conversation_id
 
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        # The post_save receiver updates the conversation summary in the same transaction
+        with transaction.atomic():
+            serializer.save(sender=request.user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    # Bulk ingestion limits: messages per request and rows per INSERT
+    bulk_max_messages = 50_000
+    bulk_batch_size = 1_000
+
+    @action(detail=False, methods=['post'], parser_classes=[*api_settings.DEFAULT_PARSER_CLASSES, NDJSONParser])
+    def bulk(self, request, *args, **kwargs):
+        """
+        Create many messages from a JSON array or NDJSON body, all or none.
+        Each item needs a message_body, and a conversation_id unless posted
+        to a conversation's nested route.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "A non-empty list of messages is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_max_messages:
+            return Response({"error": f"At most {self.bulk_max_messages} messages per request."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        default_conversation = self.kwargs.get('conversation_pk')
+        messages, errors, allowed = [], {}, {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors[index] = "Expected an object."
+                continue
+            body = item.get('message_body')
+            if not isinstance(body, str) or not body.strip():
+                errors[index] = "Message body cannot be empty."
+                continue
+            conversation_id = to_conversation_id(default_conversation or item.get('conversation_id'))
+            if not conversation_id:
+                errors[index] = "conversation_id is required."
+                continue
+            # ✅ Participation checked once per conversation, not per message
+            if conversation_id not in allowed:
+                allowed[conversation_id] = is_participant(request, conversation_id)
+            if not allowed[conversation_id]:
+                return Response({"detail": f"You are not a participant in conversation {conversation_id}."},
+                                status=status.HTTP_403_FORBIDDEN)
+            messages.append(Message(conversation_id=conversation_id, sender_id=request.user.pk, message_body=body))
+
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            Message.objects.bulk_create(messages, batch_size=self.bulk_batch_size)
+            record_messages(messages)
+            publish_messages(messages)
+        return Response({"created": len(messages)}, status=status.HTTP_201_CREATED)
+
     def destroy(self, request, *args, **kwargs):
         message = self.get_object()
         if message.sender != request.user:
             return Response({"detail": "You can only delete your own messages."}, status=status.HTTP_403_FORBIDDEN)
         return super().destroy(request, *args, **kwargs)
+
+    def perform_destroy(self, instance):
+        # Deletes elsewhere (admin, cascades) are caught up by rebuild_conversation_summaries
+        with transaction.atomic():
+            instance.delete()
+            forget_message(instance)
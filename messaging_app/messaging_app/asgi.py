@@ -1 +1,15 @@
+"""
+ASGI config for messaging_app project.
 
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn messaging_app.asgi:application``)
+for the streaming /api/conversations/<id>/events/ endpoint.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'messaging_app.settings')
+
+application = get_asgi_application()
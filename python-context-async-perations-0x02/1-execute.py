@@ -62,6 +62,137 @@ class ExecuteQuery:
         # Return False to propagate any exceptions
         return False
 
+class ExecuteBatch:
+    """
+    A context manager that runs several related queries in one round trip.
+    All queries share one connection and one transaction, so they read from
+    the same snapshot of the database.
+    """
+    
+    def __init__(self, database_name, queries):
+        """
+        Initialize the context manager with database name and queries.
+        
+        Args:
+            database_name (str): Name of the database file
+            queries (list): (query, parameters) pairs; a bare query string
+                is also accepted when it takes no parameters
+        """
+        self.database_name = database_name
+        self.queries = [
+            (query, ()) if isinstance(query, str) else (query[0], query[1] or ())
+            for query in queries
+        ]
+        self.connection = None
+        self.results = None
+    
+    def __enter__(self):
+        """
+        Enter the context manager - open connection and run every query.
+        
+        Returns:
+            list: One result list per query, in the order given
+        """
+        # Manage the transaction explicitly so reads share a single snapshot
+        self.connection = sqlite3.connect(self.database_name, isolation_level=None)
+        self.connection.execute("BEGIN")
+        
+        self.results = []
+        try:
+            for query, parameters in self.queries:
+                cursor = self.connection.execute(query, parameters)
+                self.results.append(cursor.fetchall())
+                cursor.close()
+        except Exception:
+            # __exit__ is not called when __enter__ raises, so clean up here
+            self.connection.rollback()
+            self.connection.close()
+            self.connection = None
+            raise
+        
+        return self.results
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Exit the context manager - end the transaction and close connection.
+        
+        Args:
+            exc_type: Exception type (if any)
+            exc_val: Exception value (if any)
+            exc_tb: Exception traceback (if any)
+        """
+        if self.connection:
+            if self.connection.in_transaction:
+                if exc_type is None:
+                    self.connection.commit()
+                else:
+                    self.connection.rollback()
+            self.connection.close()
+        
+        # Return False to propagate any exceptions
+        return False
+
+class ExecuteMany:
+    """
+    A context manager that runs one statement for many parameter tuples
+    with executemany, on a single connection and in a single transaction.
+    """
+    
+    def __init__(self, database_name, query, seq_of_parameters):
+        """
+        Initialize the context manager with database name, query, and parameters.
+        
+        Args:
+            database_name (str): Name of the database file
+            query (str): SQL statement to execute
+            seq_of_parameters (iterable): Parameter tuples, one per execution
+        """
+        self.database_name = database_name
+        self.query = query
+        self.seq_of_parameters = seq_of_parameters
+        self.connection = None
+        self.rowcount = None
+    
+    def __enter__(self):
+        """
+        Enter the context manager - open connection and run the statement.
+        
+        Returns:
+            int: Number of rows modified
+        """
+        self.connection = sqlite3.connect(self.database_name)
+        try:
+            cursor = self.connection.executemany(self.query, self.seq_of_parameters)
+            self.rowcount = cursor.rowcount
+            cursor.close()
+        except Exception:
+            # __exit__ is not called when __enter__ raises, so clean up here
+            self.connection.rollback()
+            self.connection.close()
+            self.connection = None
+            raise
+        
+        return self.rowcount
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Exit the context manager - commit or roll back and close connection.
+        
+        Args:
+            exc_type: Exception type (if any)
+            exc_val: Exception value (if any)
+            exc_tb: Exception traceback (if any)
+        """
+        if self.connection:
+            if exc_type is None:
+                self.connection.commit()
+            else:
+                self.connection.rollback()
+            self.connection.close()
+        
+        # Return False to propagate any exceptions
+        return False
+
 def create_sample_database():
     """
     Create a sample database with users table for testing.
@@ -122,17 +253,24 @@ def main():
     print("\nDatabase connection and cursor closed automatically!")
     
     # Demonstrate with different queries
-    print("\n=== Additional Query Examples ===")
+    print("\n=== Additional Query Examples (one batch, one connection) ===")
     
-    # Query all users
-    with ExecuteQuery('users.db', "SELECT * FROM users") as results:
-        print(f"\nTotal users in database: {len(results)}")
-    
-    # Query users older than 40
-    with ExecuteQuery('users.db', "SELECT name, age FROM users WHERE age > ?", (40,)) as results:
+    with ExecuteBatch('users.db', [
+        ("SELECT * FROM users", ()),
+        ("SELECT name, age FROM users WHERE age > ?", (40,)),
+    ]) as (all_users, older_users):
+        # Query all users
+        print(f"\nTotal users in database: {len(all_users)}")
+        
+        # Query users older than 40
         print(f"\nUsers older than 40:")
-        for row in results:
+        for row in older_users:
             print(f"  - {row[0]} (age {row[1]})")
+    
+    # Update many rows with a single executemany call
+    with ExecuteMany('users.db', "UPDATE users SET age = age + 1 WHERE id = ?",
+                     [(1,), (2,), (3,)]) as rowcount:
+        print(f"\nBirthdays recorded for {rowcount} users")
 
 if __name__ == "__main__":
     main()
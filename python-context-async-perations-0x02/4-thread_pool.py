@@ -0,0 +1,281 @@
+import asyncio
+import importlib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class AsyncQueryExecutor:
+    """
+    An adapter that runs blocking sqlite3 query code on a dedicated, bounded
+    thread pool so it can be awaited from an asyncio event loop.
+    Every worker thread keeps its own read connection to a WAL database,
+    so reads issued concurrently really run in parallel.
+    """
+
+    def __init__(self, database_name, max_workers=4):
+        """
+        Initialize the executor with database name and pool size.
+
+        Args:
+            database_name (str): Name of the database file
+            max_workers (int): Maximum number of worker threads (default: 4)
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        self.database_name = database_name
+        self.max_workers = max_workers
+        self._executor = None
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Switch the database to WAL mode and start the worker threads.
+
+        Returns:
+            AsyncQueryExecutor: The started executor
+        """
+        if self._executor is not None:
+            return self
+
+        # WAL lets readers run alongside each other and alongside a writer
+        conn = sqlite3.connect(self.database_name)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        finally:
+            conn.close()
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="sqlite-reader"
+        )
+        return self
+
+    def close(self):
+        """
+        Stop the worker threads and close every per-thread connection.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+
+        # Drop the (now closed) connections cached on worker threads
+        self._local = threading.local()
+
+    async def __aenter__(self):
+        """
+        Enter the async context manager - start the thread pool.
+
+        Returns:
+            AsyncQueryExecutor: The started executor
+        """
+        return self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """
+        Exit the async context manager - shut the thread pool down.
+
+        Args:
+            exc_type: Exception type (if any)
+            exc_val: Exception value (if any)
+            exc_tb: Exception traceback (if any)
+        """
+        self.close()
+
+        # Return False to propagate any exceptions
+        return False
+
+    def _get_connection(self):
+        """
+        Return the read connection owned by the current worker thread,
+        opening it on first use.
+
+        Returns:
+            sqlite3.Connection: Database connection for this thread
+        """
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            # The connection is only used by this thread; the flag lets
+            # close() release it from the thread that shuts the pool down
+            conn = sqlite3.connect(self.database_name, check_same_thread=False)
+            conn.execute("PRAGMA query_only=ON")
+            self._local.connection = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _fetch_all(self, query, parameters):
+        """
+        Execute a read query on this thread's connection (runs in a worker).
+
+        Args:
+            query (str): SQL query to execute
+            parameters (tuple): Parameters for the query
+
+        Returns:
+            list: Query results
+        """
+        cursor = self._get_connection().execute(query, parameters)
+        try:
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run any blocking callable (ExecuteQuery, decorated fetchers, ...) on
+        the thread pool and await its result.
+
+        Args:
+            func (callable): Blocking function to run
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Any: Whatever func returns
+        """
+        if self._executor is None:
+            raise RuntimeError("AsyncQueryExecutor is not started")
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: func(*args, **kwargs)
+        )
+
+    async def fetch_all(self, query, parameters=None):
+        """
+        Execute a read query on a worker's own connection.
+
+        Args:
+            query (str): SQL query to execute
+            parameters (tuple): Parameters for the query (optional)
+
+        Returns:
+            list: Query results
+        """
+        return await self.run(self._fetch_all, query, parameters or ())
+
+    async def execute_query(self, query, parameters=None):
+        """
+        Run the synchronous ExecuteQuery context manager on the thread pool.
+
+        Args:
+            query (str): SQL query to execute
+            parameters (tuple): Parameters for the query (optional)
+
+        Returns:
+            list: Query results
+        """
+        return await self.run(
+            run_execute_query, self.database_name, query, parameters
+        )
+
+def run_execute_query(database_name, query, parameters=None):
+    """
+    Execute a query through the ExecuteQuery context manager from 1-execute.py.
+
+    Args:
+        database_name (str): Name of the database file
+        query (str): SQL query to execute
+        parameters (tuple): Parameters for the query (optional)
+
+    Returns:
+        list: Query results
+    """
+    ExecuteQuery = importlib.import_module("1-execute").ExecuteQuery
+
+    with ExecuteQuery(database_name, query, parameters) as results:
+        return results
+
+def create_sample_database():
+    """
+    Create a sample database with users table for testing.
+    """
+    conn = sqlite3.connect('users.db')
+    cursor = conn.cursor()
+
+    # Create users table if it doesn't exist
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            age INTEGER
+        )
+    ''')
+
+    # Insert sample data with various ages
+    sample_users = [
+        (1, 'Alice Johnson', 'alice@example.com', 30),
+        (2, 'Bob Smith', 'bob@example.com', 45),
+        (3, 'Charlie Brown', 'charlie@example.com', 25),
+        (4, 'Diana Prince', 'diana@example.com', 35),
+        (5, 'Eve Wilson', 'eve@example.com', 50),
+        (6, 'Frank Miller', 'frank@example.com', 28),
+        (7, 'Grace Lee', 'grace@example.com', 42),
+        (8, 'Henry Ford', 'henry@example.com', 38),
+        (9, 'Ivy Chen', 'ivy@example.com', 55),
+        (10, 'Jack Brown', 'jack@example.com', 33)
+    ]
+
+    cursor.executemany(
+        'INSERT OR REPLACE INTO users (id, name, email, age) VALUES (?, ?, ?, ?)',
+        sample_users
+    )
+
+    conn.commit()
+    conn.close()
+    print("Sample database created successfully!")
+
+async def main():
+    """
+    Main async function to demonstrate offloading sync queries to threads.
+    """
+    # Create sample database first
+    create_sample_database()
+
+    print("\n=== Thread-Pool Offloaded Database Queries ===")
+
+    async with AsyncQueryExecutor('users.db', max_workers=4) as executor:
+        # Per-thread connections, awaited concurrently
+        all_users, older_users = await asyncio.gather(
+            executor.fetch_all("SELECT * FROM users"),
+            executor.fetch_all("SELECT * FROM users WHERE age > ?", (40,))
+        )
+        print(f"fetch_all: Retrieved {len(all_users)} users")
+        print(f"fetch_all: Retrieved {len(older_users)} users older than 40")
+
+        # Reuse the existing ExecuteQuery context manager without blocking the loop
+        results = await executor.execute_query(
+            "SELECT name, age FROM users WHERE age > ?", (25,)
+        )
+        print(f"execute_query: Retrieved {len(results)} users older than 25")
+
+        print("\n=== Performance Comparison ===")
+
+        queries = [("SELECT * FROM users WHERE age > ?", (age,)) for age in range(20, 60)]
+
+        start_time = time.time()
+        await asyncio.gather(*(executor.fetch_all(q, p) for q, p in queries))
+        concurrent_time = time.time() - start_time
+
+        start_time = time.time()
+        for q, p in queries:
+            await executor.fetch_all(q, p)
+        sequential_time = time.time() - start_time
+
+        print(f"Concurrent execution time: {concurrent_time:.4f} seconds")
+        print(f"Sequential execution time: {sequential_time:.4f} seconds")
+
+    print("\nThread pool stopped and connections closed automatically!")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,335 @@
+import asyncio
+import itertools
+import re
+import sqlite3
+import time
+
+import aiosqlite
+
+READ_KEYWORDS = ("SELECT", "EXPLAIN")
+# A WITH statement is a read unless its CTEs feed one of these
+DML_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE)\b")
+STRING_LITERALS = re.compile(r"'(?:[^']|'')*'")
+
+class _Node:
+    """
+    One open connection to a database file plus its in-flight query count.
+    """
+
+    def __init__(self, path, connection):
+        """
+        Initialize the node.
+
+        Args:
+            path (str): Database file the connection points to
+            connection (aiosqlite.Connection): Open connection
+        """
+        self.path = path
+        self.connection = connection
+        self.in_flight = 0
+
+class ReplicaRouter:
+    """
+    Routes queries across a primary SQLite database and its read-only replicas.
+    Reads go to a replica (round-robin or least-loaded), writes go to the
+    primary, and gather() fans a batch of reads out across all replicas.
+    """
+
+    STRATEGIES = ("round_robin", "least_loaded")
+
+    def __init__(self, primary, replicas=None, strategy="round_robin",
+                 connections_per_replica=1):
+        """
+        Initialize the router with the primary and replica database paths.
+
+        Args:
+            primary (str): Path of the primary (writable) database file
+            replicas (list): Paths of read-only replica files (optional);
+                reads fall back to the primary when empty
+            strategy (str): "round_robin" or "least_loaded"
+            connections_per_replica (int): Connections opened per replica
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown routing strategy: {strategy}")
+        if connections_per_replica < 1:
+            raise ValueError("connections_per_replica must be at least 1")
+
+        self.primary = primary
+        self.replicas = list(replicas or [])
+        self.strategy = strategy
+        self.connections_per_replica = connections_per_replica
+        self._primary_node = None
+        self._read_nodes = []
+        self._cycle = None
+
+    async def open(self):
+        """
+        Open the primary connection and the replica connections.
+
+        Returns:
+            ReplicaRouter: The opened router
+        """
+        if self._primary_node is not None:
+            return self
+
+        self._primary_node = _Node(self.primary, await aiosqlite.connect(self.primary))
+
+        for path in self.replicas:
+            for _ in range(self.connections_per_replica):
+                # Replicas are opened read-only so a stray write fails loudly
+                conn = await aiosqlite.connect(f"file:{path}?mode=ro", uri=True)
+                self._read_nodes.append(_Node(path, conn))
+
+        if not self._read_nodes:
+            self._read_nodes.append(self._primary_node)
+
+        self._cycle = itertools.cycle(self._read_nodes)
+        return self
+
+    async def close(self):
+        """
+        Close every connection held by the router.
+        """
+        nodes = {id(node): node for node in self._read_nodes}
+        if self._primary_node is not None:
+            nodes[id(self._primary_node)] = self._primary_node
+
+        for node in nodes.values():
+            await node.connection.close()
+
+        self._primary_node = None
+        self._read_nodes = []
+        self._cycle = None
+
+    async def __aenter__(self):
+        """
+        Enter the async context manager - open all connections.
+
+        Returns:
+            ReplicaRouter: The opened router
+        """
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """
+        Exit the async context manager - close all connections.
+
+        Args:
+            exc_type: Exception type (if any)
+            exc_val: Exception value (if any)
+            exc_tb: Exception traceback (if any)
+        """
+        await self.close()
+
+        # Return False to propagate any exceptions
+        return False
+
+    @staticmethod
+    def is_read(query):
+        """
+        Decide whether a query is a read that a replica can serve.
+        PRAGMA statements go to the primary, as many of them write.
+
+        Args:
+            query (str): SQL query
+
+        Returns:
+            bool: True for read-only statements
+        """
+        statement = query.lstrip().upper()
+        if statement.startswith(READ_KEYWORDS):
+            return True
+        if statement.startswith("WITH"):
+            return not DML_KEYWORDS.search(STRING_LITERALS.sub("''", statement))
+        return False
+
+    def _pick_read_node(self):
+        """
+        Choose the connection that serves the next read.
+
+        Returns:
+            _Node: Selected replica node
+        """
+        if self._primary_node is None:
+            raise RuntimeError("ReplicaRouter is not open")
+
+        if self.strategy == "least_loaded":
+            return min(self._read_nodes, key=lambda node: node.in_flight)
+        return next(self._cycle)
+
+    async def fetch(self, query, parameters=None):
+        """
+        Run a read query on a replica.
+
+        Args:
+            query (str): SQL query to execute
+            parameters (tuple): Parameters for the query (optional)
+
+        Returns:
+            list: Query results
+        """
+        node = self._pick_read_node()
+        node.in_flight += 1
+        try:
+            async with node.connection.execute(query, parameters or ()) as cursor:
+                return await cursor.fetchall()
+        finally:
+            node.in_flight -= 1
+
+    async def execute(self, query, parameters=None):
+        """
+        Run a write query on the primary and commit it.
+
+        Args:
+            query (str): SQL statement to execute
+            parameters (tuple): Parameters for the statement (optional)
+
+        Returns:
+            int: Number of rows modified
+        """
+        if self._primary_node is None:
+            raise RuntimeError("ReplicaRouter is not open")
+
+        conn = self._primary_node.connection
+        async with conn.execute(query, parameters or ()) as cursor:
+            rowcount = cursor.rowcount
+        await conn.commit()
+        return rowcount
+
+    async def run(self, query, parameters=None, read=None):
+        """
+        Route a query automatically: reads to a replica, writes to the primary.
+
+        Args:
+            query (str): SQL query to execute
+            parameters (tuple): Parameters for the query (optional)
+            read (bool): Force the routing instead of guessing it from
+                the query (optional)
+
+        Returns:
+            list | int: Rows for reads, modified row count for writes
+        """
+        if self.is_read(query) if read is None else read:
+            return await self.fetch(query, parameters)
+        return await self.execute(query, parameters)
+
+    async def gather(self, *queries):
+        """
+        Fan several read queries out across the replicas concurrently.
+
+        Args:
+            *queries: (query, parameters) pairs or bare query strings
+
+        Returns:
+            list: One result list per query, in the order given
+        """
+        return await asyncio.gather(*(
+            self.fetch(query) if isinstance(query, str) else self.fetch(*query)
+            for query in queries
+        ))
+
+def create_sample_database():
+    """
+    Create a sample database with users table for testing.
+    """
+    conn = sqlite3.connect('users.db')
+    cursor = conn.cursor()
+
+    # Create users table if it doesn't exist
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            age INTEGER
+        )
+    ''')
+
+    # Insert sample data with various ages
+    sample_users = [
+        (1, 'Alice Johnson', 'alice@example.com', 30),
+        (2, 'Bob Smith', 'bob@example.com', 45),
+        (3, 'Charlie Brown', 'charlie@example.com', 25),
+        (4, 'Diana Prince', 'diana@example.com', 35),
+        (5, 'Eve Wilson', 'eve@example.com', 50),
+        (6, 'Frank Miller', 'frank@example.com', 28),
+        (7, 'Grace Lee', 'grace@example.com', 42),
+        (8, 'Henry Ford', 'henry@example.com', 38),
+        (9, 'Ivy Chen', 'ivy@example.com', 55),
+        (10, 'Jack Brown', 'jack@example.com', 33)
+    ]
+
+    cursor.executemany(
+        'INSERT OR REPLACE INTO users (id, name, email, age) VALUES (?, ?, ?, ?)',
+        sample_users
+    )
+
+    conn.commit()
+    conn.close()
+    print("Sample database created successfully!")
+
+def create_replicas(primary, count):
+    """
+    Copy the primary database into read-only replica files.
+
+    Args:
+        primary (str): Path of the primary database file
+        count (int): Number of replicas to create
+
+    Returns:
+        list: Paths of the replica files
+    """
+    paths = []
+    source = sqlite3.connect(primary)
+    for index in range(1, count + 1):
+        path = f"users_replica_{index}.db"
+        target = sqlite3.connect(path)
+        source.backup(target)
+        target.close()
+        paths.append(path)
+    source.close()
+    print(f"Created {count} replicas: {', '.join(paths)}")
+    return paths
+
+async def main():
+    """
+    Main async function to demonstrate routing queries across replicas.
+    """
+    # Create sample database and its replicas first
+    create_sample_database()
+    replicas = create_replicas('users.db', 3)
+
+    print("\n=== Replica-Routed Concurrent Queries ===")
+
+    async with ReplicaRouter('users.db', replicas, strategy="least_loaded") as router:
+        all_users, older_users = await router.gather(
+            "SELECT * FROM users",
+            ("SELECT * FROM users WHERE age > ?", (40,))
+        )
+        print(f"gather: Retrieved {len(all_users)} users")
+        print(f"gather: Retrieved {len(older_users)} users older than 40")
+
+        # Writes always land on the primary
+        rowcount = await router.run(
+            "UPDATE users SET email = ? WHERE id = ?", ('alice@new.example.com', 1)
+        )
+        print(f"run: Updated {rowcount} row on the primary")
+
+        print("\n=== Performance Comparison ===")
+
+        queries = [("SELECT * FROM users WHERE age > ?", (age,)) for age in range(20, 60)]
+
+        start_time = time.time()
+        await router.gather(*queries)
+        concurrent_time = time.time() - start_time
+
+        start_time = time.time()
+        for query in queries:
+            await router.fetch(*query)
+        sequential_time = time.time() - start_time
+
+        print(f"Fan-out execution time: {concurrent_time:.4f} seconds")
+        print(f"Sequential execution time: {sequential_time:.4f} seconds")
+
+if __name__ == "__main__":
+    asyncio.run(main())